@@ -6,8 +6,13 @@ import pandas as pd
 import time
 import re
 import logging
-from config import Config
-from src import database, ai_generator, visualizations
+import threading
+from config import Config, validate_config
+
+# Kredensial Supabase & Groq wajib untuk aplikasi (diperiksa sebelum klien API dibuat)
+validate_config()
+
+from src import database, ai_generator, visualizations, similarity, weighting, suggestions, features, ranking_store
 
 # Pengaturan logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='app.log', filemode='a')
@@ -34,12 +39,155 @@ if 'messages' not in st.session_state:
     st.session_state.messages = []
 if 'active_tab' not in st.session_state:
     st.session_state.active_tab = 0
+if 'score_matrices' not in st.session_state:
+    st.session_state.score_matrices = {}
+if 'tgv_matrix_cache' not in st.session_state:
+    st.session_state.tgv_matrix_cache = {}
+if 'cancel_notice' not in st.session_state:
+    st.session_state.cancel_notice = False
+if 'cohort' not in st.session_state:
+    st.session_state.cohort = None
 
 # Muat data
 @st.cache_data(ttl=Config.CACHE_TTL)
 def load_initial_data():
     return database.get_employee_list(), database.get_role_list()
 
+@st.cache_data(ttl=Config.CACHE_TTL)
+def load_cohort_options():
+    """Nama direktorat/grade/posisi/divisi untuk filter populasi kandidat"""
+    options = {}
+    for name, (table_name, _) in database.COHORT_DIMENSIONS.items():
+        df_dim = database.load_table(table_name)
+        options[name] = sorted(df_dim['name'].dropna().unique().tolist()) if not df_dim.empty else []
+    return options
+
+@st.cache_resource
+def get_feature_store():
+    """Feature store bersama: snapshot tabel ber-versi yang juga dipakai notebook analisis"""
+    return features.FeatureStore()
+
+@st.cache_resource
+def get_ranking_store():
+    """Store ranking persisten: hasil per peran/benchmark dipakai ulang selama versi data sama"""
+    return ranking_store.RankingStore()
+
+@st.cache_resource
+def get_prepared_cache():
+    """Wadah data sumber yang disiapkan, dibagi ke semua sesi (hanya data, tanpa elemen Streamlit)"""
+    return {'prepared': {}, 'version': None, 'loaded_at': 0.0, 'artifacts': {}, 'lock': threading.Lock()}
+
+def load_prepared_data(progress=None, cancel=None, version=None):
+    """
+    Data sumber pencocokan yang disiapkan sekali dan dipakai bersama semua sesi
+    Dimuat di luar fungsi ber-cache Streamlit: progress bar diperbarui lewat callback progress,
+    dan pembaruan elemen di dalam fungsi ber-cache akan diputar ulang (dan gagal) saat cache hit.
+    Hasil kosong tidak disimpan; snapshot dimuat ulang setelah CACHE_TTL atau bila version
+    (database.source_version) berbeda dari versi snapshot, dan artefak turunannya ikut dibuang
+    """
+    cache = get_prepared_cache()
+    with cache['lock']:
+        expired = time.time() - cache['loaded_at'] > Config.CACHE_TTL
+        changed = version is not None and version != cache['version']
+        if not cache['prepared'] or expired or changed:
+            version = version or database.source_version(database.SOURCE_TABLES)
+            tables = get_feature_store().load_tables(database.SOURCE_TABLES, refresh=True, progress=progress, cancel=cancel)
+            prepared = database.prepare_source_data(tables, progress=progress, cancel=cancel)
+            if prepared:
+                cache.update(prepared=prepared, version=version, loaded_at=time.time(), artifacts={})
+            return prepared
+        return cache['prepared']
+
+def snapshot_loaded():
+    """Apakah snapshot data sumber sudah dimuat dan belum kedaluwarsa (tanpa memuat apa pun)"""
+    cache = get_prepared_cache()
+    return bool(cache['prepared']) and time.time() - cache['loaded_at'] <= Config.CACHE_TTL
+
+def snapshot_artifact(name, build, progress=None, cancel=None):
+    """
+    Artefak turunan snapshot (indeks kemiripan, saran benchmark): dibangun sekali per snapshot
+    dan dibuang saat snapshot disegarkan, sehingga selalu sesuai dengan data yang sedang dipakai
+    """
+    prepared = load_prepared_data(progress, cancel)
+    cache = get_prepared_cache()
+    with cache['lock']:
+        if cache['prepared'] is prepared and name in cache['artifacts']:
+            return cache['artifacts'][name]
+    artifact = build(prepared)
+    with cache['lock']:
+        if cache['prepared'] is prepared:
+            cache['artifacts'][name] = artifact
+    return artifact
+
+def load_similarity_index(progress=None, cancel=None):
+    return snapshot_artifact('similarity', similarity.SimilarityIndex.from_prepared, progress, cancel)
+
+def load_benchmark_suggestions(progress=None, cancel=None):
+    """Saran benchmark per posisi/grade untuk snapshot data saat ini"""
+    return snapshot_artifact(
+        'suggestions',
+        lambda prepared: suggestions.build_benchmark_suggestions(prepared, load_similarity_index()),
+        progress, cancel
+    )
+
+def cancel_run(run_token):
+    """Callback tombol Cancel: dijalankan di awal rerun, setelah proses sebelumnya dihentikan Streamlit"""
+    run_token.cancel()
+    st.session_state.cancel_notice = True
+    logging.info("Process cancelled by user")
+
+def progress_reporter(progress_bar):
+    """Terjemahkan event progres pipeline (dict) menjadi persentase dan teks progress bar"""
+    def report(event):
+        stage = event.get('stage')
+        if stage == 'loading':
+            tables_total = event.get('tables_total') or 1
+            tables_done = event.get('tables_done', 0)
+            pages_total = event.get('pages_total')
+            pages_done = event.get('pages_done', 0)
+            fraction = tables_done / tables_total
+            if pages_total and not event.get('table_done'):
+                fraction += min(pages_done / pages_total, 1.0) / tables_total
+            pages_text = f"page {pages_done}/{pages_total}" if pages_total else f"{event.get('rows', 0)} rows"
+            progress_bar.progress(5 + int(55 * min(fraction, 1.0)),
+                                  text=f"Loading {event.get('table')}: {pages_text} ({tables_done}/{tables_total} tables)")
+        elif stage == 'preparing':
+            progress_bar.progress(65, text="Preparing source data...")
+        elif stage == 'matching':
+            steps = {'baseline': 70, 'scoring': 75, 'assembling': 85}
+            progress_bar.progress(steps.get(event.get('step'), 70), text=f"Calculating match scores ({event.get('step')})...")
+    return report
+
+def describe_cohort(cohort):
+    """Ringkasan teks filter populasi kandidat"""
+    parts = []
+    for name, value in cohort.items():
+        if name == 'tenure_months':
+            low, high = value
+            parts.append(f"tenure {low or 0}-{high if high is not None else '∞'} months")
+        else:
+            parts.append(f"{name}: {', '.join(value)}")
+    return "; ".join(parts)
+
+def apply_benchmark_suggestions(benchmark_suggestions):
+    """Isi pilihan benchmark dengan saran untuk peran dan level jabatan yang dipilih"""
+    role = st.session_state.get('role_select')
+    if not role or role == "[New Role]":
+        return
+    suggested_ids = suggestions.suggest_benchmarks(benchmark_suggestions, role, st.session_state.get('job_level'))
+    if suggested_ids:
+        labels = employee_df.set_index('employee_id').reindex(suggested_ids)['label'].dropna().tolist()
+        st.session_state.benchmark_select = labels
+
+def prefill_benchmarks():
+    """
+    Isi otomatis pilihan benchmark saat peran atau level jabatan berubah
+    Hanya bila snapshot data sudah dimuat: callback tidak memuat tabel (tanpa progres);
+    bila belum, sidebar menampilkan tombol "Suggest benchmarks"
+    """
+    if snapshot_loaded():
+        apply_benchmark_suggestions(load_benchmark_suggestions())
+
 employee_df, role_list = load_initial_data()
 
 if employee_df.empty:
@@ -60,7 +208,8 @@ with st.sidebar:
     role_selected = st.selectbox(
         "Role / Position",
         options=role_options,
-        key="role_select"
+        key="role_select",
+        on_change=prefill_benchmarks
     )
     
     # Tampilkan input manual segera saat [New Role] dipilih
@@ -70,18 +219,48 @@ with st.sidebar:
     else:
         role_name = role_selected
     
-    job_level = st.selectbox("Job Level", ["I", "II", "III", "IV", "V", "VI"], index=3)
+    job_level = st.selectbox("Job Level", ["I", "II", "III", "IV", "V", "VI"], index=3, key="job_level", on_change=prefill_benchmarks)
     role_purpose = st.text_area("Role Purpose", placeholder="Describe main purpose...", height=100)
     
+    # Saran benchmark butuh snapshot data; bila belum dimuat, pemuatan dijalankan atas permintaan dengan progres
+    if role_selected and role_selected != "[New Role]" and not snapshot_loaded():
+        if st.button("Suggest benchmarks", use_container_width=True,
+                     help="Load the data snapshot and prefill representative top performers for this role"):
+            suggest_bar = st.progress(0, text="Loading data for suggestions...")
+            apply_benchmark_suggestions(load_benchmark_suggestions(progress_reporter(suggest_bar)))
+            suggest_bar.empty()
+    
     benchmark_options = employee_df['label'].tolist()
     selected_benchmark_labels = st.multiselect(
         "Select Benchmark Employees",
         options=benchmark_options,
-        help="Choose 3-5 top performers"
+        key="benchmark_select",
+        help="Choose 3-5 top performers. Prefilled with representative top performers when a role is selected."
     )
     
+    # Populasi kandidat: disaring sebelum diskor (benchmark boleh dari luar populasi)
+    with st.expander("Candidate Population"):
+        cohort_options = load_cohort_options()
+        cohort = {
+            name: st.multiselect(name.capitalize(), options=cohort_options.get(name, []), key=f"cohort_{name}")
+            for name in database.COHORT_DIMENSIONS
+        }
+        tenure_low, tenure_high = st.slider(
+            "Tenure (months)", 0, Config.MAX_TENURE_MONTHS, (0, Config.MAX_TENURE_MONTHS), key="cohort_tenure"
+        )
+        if tenure_low > 0 or tenure_high < Config.MAX_TENURE_MONTHS:
+            cohort['tenure_months'] = (
+                tenure_low if tenure_low > 0 else None,
+                tenure_high if tenure_high < Config.MAX_TENURE_MONTHS else None,
+            )
+        cohort = {name: value for name, value in cohort.items() if value} or None
+    
     submitted = st.button("Generate Profile & Match", type="primary", use_container_width=True)
 
+if st.session_state.cancel_notice:
+    st.session_state.cancel_notice = False
+    st.info("Process cancelled.")
+
 # Proses saat submit
 if submitted:
     logging.info("Process submitted started")
@@ -99,6 +278,10 @@ if submitted:
         st.warning("Please enter role purpose.")
         logging.warning("Empty role purpose")
     else:
+        run_token = database.CancellationToken()
+        # Tombol Cancel hanya ada selama proses berjalan; klik memicu rerun yang menghentikan proses ini
+        cancel_placeholder = st.empty()
+        cancel_placeholder.button("Cancel", key="cancel_run", on_click=cancel_run, args=(run_token,))
         try:  # Batas error untuk seluruh proses
             st.session_state.role_name_final = role_name
             st.session_state.process_complete = False
@@ -108,11 +291,29 @@ if submitted:
             st.session_state.selected_benchmark_ids = selected_benchmark_ids
             
             progress_bar = st.progress(0, text="Starting process...")
+            report = progress_reporter(progress_bar)
             
             # Hitung pencocokan
             with st.spinner("Calculating match scores..."):
-                progress_bar.progress(30, text="Loading data & calculating...")
-                st.session_state.results_df = database.run_matching_query(selected_benchmark_ids)
+                # Versi data dari jumlah baris per tabel (tanpa mengunduh tabel) agar store ranking
+                # diperiksa lebih dulu; data hanya dimuat dan dihitung saat hasilnya belum tersimpan.
+                # Tahun kompetensi terbaru disimpan dengan as_of_year=None
+                progress_bar.progress(2, text="Checking stored rankings...")
+                data_version = database.source_version(database.SOURCE_TABLES)
+                st.session_state.cohort = cohort
+                results_df = pd.DataFrame()
+                if data_version:
+                    results_df = get_ranking_store().get(role_name, selected_benchmark_ids, None, data_version, cohort)
+                if results_df.empty:
+                    prepared = load_prepared_data(report, run_token, data_version)
+                    results_df = database.compute_matching(
+                        prepared, selected_benchmark_ids, progress=report, cancel=run_token, cohort=cohort
+                    )
+                    if data_version:
+                        get_ranking_store().put(role_name, selected_benchmark_ids, None, data_version, results_df, cohort)
+                else:
+                    progress_bar.progress(85, text="Loaded stored ranking")
+                st.session_state.results_df = results_df
             
             results_df = st.session_state.results_df
             if not results_df.empty:
@@ -125,6 +326,10 @@ if submitted:
             if st.session_state.results_df.empty:
                 raise ValueError("Match calculation returned empty results")
             
+            # Matriks skor untuk pembobotan TGV what-if (tanpa menjalankan ulang pencocokan)
+            st.session_state.score_matrices = weighting.build_score_matrices(st.session_state.results_df)
+            st.session_state.tgv_matrix_cache = {}
+            
             # Indikator kualitas data: Periksa kelengkapan benchmark
             benchmark_df = st.session_state.results_df[st.session_state.results_df['employee_id'].isin(selected_benchmark_ids)]
             avg_completeness = benchmark_df['data_completeness'].mean()
@@ -133,8 +338,9 @@ if submitted:
                 logging.warning(f"Low benchmark completeness: {avg_completeness:.1f}%")
             
             # Bangkitkan profil AI
+            run_token.raise_if_cancelled()
             with st.spinner("Generating AI profile..."):
-                progress_bar.progress(70, text="Contacting AI...")
+                progress_bar.progress(90, text="Contacting AI...")
                 st.session_state.ai_profile = ai_generator.generate_job_profile(
                     role_name, role_purpose, job_level
                 )
@@ -147,18 +353,31 @@ if submitted:
             st.success("Profile and talent ranking generated successfully!")
             logging.info("Process completed successfully")
         
+        except database.OperationCancelled:
+            st.info("Process cancelled.")
+            logging.info("Process cancelled by user")
+            progress_bar.empty()
+        
         except Exception as e:
             st.error(f"An error occurred: {str(e)}. Please check logs or try again.")
             logging.error(f"Process error: {str(e)}")
             progress_bar.empty()
+        
+        finally:
+            # Proses yang terhenti karena rerun (Cancel, submit baru) tidak melewati except di atas;
+            # batalkan token agar pemuatan tabel paralel yang masih berjalan ikut berhenti
+            run_token.cancel()
+            cancel_placeholder.empty()
 
 # Tampilkan hasil
 if st.session_state.process_complete:
     st.markdown("---")
     st.header("Results")
+    if st.session_state.cohort:
+        st.caption(f"Candidate population: {describe_cohort(st.session_state.cohort)} (benchmarks always included)")
     
-    tab_profile, tab_ranking, tab_dashboard, tab_compare, tab_chatbot = st.tabs([
-        "AI Profile", "Ranking", "Dashboard", "Comparison", "Ask AI"
+    tab_profile, tab_ranking, tab_dashboard, tab_compare, tab_similar, tab_chatbot = st.tabs([
+        "AI Profile", "Ranking", "Dashboard", "Comparison", "Similar Employees", "Ask AI"
     ])
     
     # TAB 1: PROFIL AI
@@ -200,6 +419,83 @@ if st.session_state.process_complete:
         else:
             df_ranked = results_df.drop_duplicates(subset=['employee_id']).sort_values('final_match_rate', ascending=False)
             
+            # Pembobotan TGV (what-if) dari matriks skor yang di-cache
+            score_matrices = st.session_state.score_matrices
+            tgv_names = score_matrices.get('tgv_names', [])
+            saved_profile = weighting.load_weight_profiles().get(st.session_state.role_name_final, {})
+            saved_weights = saved_profile.get('weights', {})
+            
+            with st.expander("TGV Weighting (what-if)", expanded=bool(saved_profile)):
+                if saved_profile:
+                    st.caption(f"Saved weight profile loaded for '{st.session_state.role_name_final}'")
+                
+                tgv_weights = {}
+                weight_cols = st.columns(max(1, min(4, len(tgv_names))))
+                for i, tgv_name in enumerate(tgv_names):
+                    with weight_cols[i % len(weight_cols)]:
+                        tgv_weights[tgv_name] = st.slider(
+                            tgv_name, min_value=0.0, max_value=3.0, step=0.25,
+                            value=float(saved_weights.get(tgv_name, 1.0)),
+                            key=f"weight_{st.session_state.role_name_final}_{tgv_name}"
+                        )
+                
+                col_cap, col_policy = st.columns(2)
+                with col_cap:
+                    cap_options = ["No cap", 100, 120, 150, 200]
+                    saved_cap = saved_profile.get('cap')
+                    cap_choice = st.selectbox(
+                        "Cap TV match rate at (%)", cap_options,
+                        index=cap_options.index(int(saved_cap)) if saved_cap in cap_options else 0,
+                        help="Limit how much a single TV above benchmark can lift the score"
+                    )
+                with col_policy:
+                    policy_options = list(weighting.INVERSE_POLICIES)
+                    saved_policy = saved_profile.get('inverse_policy', weighting.DEFAULT_POLICY)
+                    inverse_policy = st.selectbox(
+                        "Inverse-scale policy", policy_options,
+                        index=policy_options.index(saved_policy) if saved_policy in policy_options else 0,
+                        format_func=weighting.INVERSE_POLICIES.get
+                    )
+                
+                cap = None if cap_choice == "No cap" else float(cap_choice)
+                if st.button("Save weights for this role"):
+                    weighting.save_weight_profile(st.session_state.role_name_final, tgv_weights, cap, inverse_policy)
+                    st.success(f"Weight profile saved for '{st.session_state.role_name_final}'")
+            
+            is_weighted = any(w != 1.0 for w in tgv_weights.values()) or cap is not None or inverse_policy != weighting.DEFAULT_POLICY
+            if is_weighted and score_matrices:
+                matrix_key = (cap, inverse_policy)
+                if matrix_key not in st.session_state.tgv_matrix_cache:
+                    st.session_state.tgv_matrix_cache[matrix_key] = weighting.tgv_matrix(score_matrices, cap, inverse_policy)
+                tgv_values, tgv_mask = st.session_state.tgv_matrix_cache[matrix_key]
+                weighted_df = weighting.rescore(score_matrices, tgv_weights, tgv_values=tgv_values, tgv_mask=tgv_mask)
+                
+                df_ranked = pd.merge(
+                    df_ranked,
+                    weighted_df[['employee_id', 'weighted_match_rate', 'base_rank', 'weighted_rank', 'rank_change']],
+                    on='employee_id', how='left'
+                ).sort_values('weighted_match_rate', ascending=False)
+                
+                st.markdown("**Rank changes (top candidates)**")
+                col_base, col_weighted = st.columns(2)
+                with col_base:
+                    st.caption("Unweighted")
+                    st.dataframe(
+                        weighted_df.sort_values('base_rank').head(Config.DEFAULT_TOP_N)[['base_rank', 'fullname', 'final_match_rate']],
+                        column_config={"base_rank": "Rank", "fullname": "Name",
+                                       "final_match_rate": st.column_config.NumberColumn("Match Rate (%)", format="%.2f")},
+                        use_container_width=True, hide_index=True
+                    )
+                with col_weighted:
+                    st.caption("Weighted")
+                    st.dataframe(
+                        weighted_df.head(Config.DEFAULT_TOP_N)[['weighted_rank', 'fullname', 'weighted_match_rate', 'rank_change']],
+                        column_config={"weighted_rank": "Rank", "fullname": "Name",
+                                       "weighted_match_rate": st.column_config.NumberColumn("Weighted (%)", format="%.2f"),
+                                       "rank_change": st.column_config.NumberColumn("Δ Rank", format="%+d")},
+                        use_container_width=True, hide_index=True
+                    )
+            
             col1, col2 = st.columns(2)
             with col1:
                 dir_options = ["All"] + sorted(df_ranked['directorate'].dropna().unique().tolist())
@@ -221,8 +517,12 @@ if st.session_state.process_complete:
             
             st.caption("⭐ = Score exceeds benchmark (>100%) | ✅ = Good data (>70%), ⚠️ = Low")
             
+            ranking_columns = ['fullname', 'role', 'grade', 'directorate', 'quality', 'data_completeness', 'final_match_rate', 'exceeds']
+            if 'weighted_match_rate' in filtered_df.columns:
+                ranking_columns += ['weighted_match_rate', 'rank_change']
+            
             st.dataframe(
-                filtered_df[['fullname', 'role', 'grade', 'directorate', 'quality', 'data_completeness', 'final_match_rate', 'exceeds']],
+                filtered_df[ranking_columns],
                 column_config={
                     "fullname": "Name",
                     "role": "Position",
@@ -241,7 +541,9 @@ if st.session_state.process_complete:
                         min_value=0,
                         max_value=max_score
                     ),
-                    "exceeds": st.column_config.TextColumn(" ", width="small")
+                    "exceeds": st.column_config.TextColumn(" ", width="small"),
+                    "weighted_match_rate": st.column_config.NumberColumn("Weighted Match Rate (%)", format="%.2f%%"),
+                    "rank_change": st.column_config.NumberColumn("Δ Rank", format="%+d", help="Positions gained with current weights")
                 },
                 height=400,
                 use_container_width=True,
@@ -253,7 +555,10 @@ if st.session_state.process_complete:
                 return df.to_csv(index=False).encode('utf-8')
             
             safe_role_name = st.session_state.role_name_final.replace(' ', '_')
-            csv_data = convert_to_csv(filtered_df[['employee_id', 'fullname', 'role', 'grade', 'directorate', 'data_completeness', 'final_match_rate']])
+            csv_columns = ['employee_id', 'fullname', 'role', 'grade', 'directorate', 'data_completeness', 'final_match_rate']
+            if 'weighted_match_rate' in filtered_df.columns:
+                csv_columns += ['weighted_match_rate', 'weighted_rank']
+            csv_data = convert_to_csv(filtered_df[csv_columns])
             
             st.download_button(
                 label="Download Results (CSV)",
@@ -336,7 +641,59 @@ if st.session_state.process_complete:
                             .sort_values(by=['tgv_name', 'tv_name'])
                         st.dataframe(detail_df, use_container_width=True, height=500, hide_index=True)
     
-    # TAB 5: CHATBOT
+    # TAB 5: KARYAWAN SERUPA
+    with tab_similar:
+        # Indeks dibangun dari snapshot data; bila ranking diambil dari store, snapshot belum dimuat
+        # dan hanya dimuat atas permintaan agar membuka peran yang sudah tersimpan tetap cepat
+        similarity_index = load_similarity_index() if snapshot_loaded() else None
+        if similarity_index is None:
+            st.info("Similarity search needs the full data snapshot, which has not been loaded in this session yet.")
+            if st.button("Load similarity index", key="load_similarity"):
+                similarity_bar = st.progress(0, text="Loading data for similarity search...")
+                similarity_index = load_similarity_index(progress_reporter(similarity_bar))
+                similarity_bar.empty()
+        
+        if similarity_index is None:
+            pass
+        elif len(similarity_index) == 0:
+            st.warning("Similarity index not available.")
+        else:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                query_mode = st.radio("Find employees similar to:", ["Benchmark centroid", "Specific employee"], horizontal=True)
+            with col2:
+                top_k = st.number_input("Number of results", min_value=5, max_value=100, value=Config.DEFAULT_TOP_N, step=5)
+            
+            similar_df = pd.DataFrame()
+            start_time = time.perf_counter()
+            if query_mode == "Benchmark centroid":
+                similar_df = similarity_index.query_centroid(st.session_state.selected_benchmark_ids, k=int(top_k))
+            else:
+                query_label = st.selectbox("Select employee:", options=[""] + employee_df['label'].tolist(), key="similar_query")
+                if query_label:
+                    query_id = employee_df[employee_df['label'] == query_label]['employee_id'].iloc[0]
+                    similar_df = similarity_index.query_employee(query_id, k=int(top_k))
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            
+            if not similar_df.empty:
+                st.caption(f"Searched {len(similarity_index)} employees in {elapsed_ms:.1f} ms. "
+                           "Similarity = cosine over normalized iq/pauli/competency/PAPI scores both employees have.")
+                display_cols = [col for col in ['fullname', 'role', 'grade', 'directorate', 'similarity', 'shared_tvs'] if col in similar_df.columns]
+                st.dataframe(
+                    similar_df[display_cols],
+                    column_config={
+                        "fullname": "Name",
+                        "role": "Position",
+                        "grade": "Grade",
+                        "directorate": "Directorate",
+                        "similarity": st.column_config.ProgressColumn("Similarity", format="%.3f", min_value=-1, max_value=1),
+                        "shared_tvs": st.column_config.NumberColumn("Shared TVs", help="Number of TVs compared"),
+                    },
+                    use_container_width=True,
+                    hide_index=True
+                )
+    
+    # TAB 6: CHATBOT
     with tab_chatbot:
         st.header("Ask AI About Results")
         
@@ -26,12 +26,45 @@ class Config:
     GOOD_MATCH = 70.0
     MIN_BENCHMARKS = 1
     RECOMMENDED_BENCHMARKS = 3
+    SUGGESTED_BENCHMARKS = 5  # jumlah benchmark yang diisi otomatis per peran
+    TOP_PERFORMER_RATING = 5
+    
+    # Pemuatan tabel paralel
+    LOAD_WORKERS = 4
+    
+    # Layanan HTTP pencocokan
+    SERVICE_HOST = os.getenv("MATCH_SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT = int(os.getenv("MATCH_SERVICE_PORT", "8600"))
+    SERVICE_WORKERS = 8
+    SERVICE_CACHE_SIZE = 64  # jumlah set benchmark yang hasilnya disimpan
+    SERVICE_PAGE_SIZE = 50
+    SERVICE_MAX_PAGE_SIZE = 500
+    
+    # Skema ERD untuk normalisasi tipe kolom saat tabel dimuat
+    ERD_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "ERD Paragon TM.sql")
+    
+    # Feature store bersama (app & notebook)
+    FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", ".feature_cache")
+    
+    # Profil bobot TGV per peran
+    WEIGHT_PROFILES_PATH = os.getenv("WEIGHT_PROFILES_PATH", "weight_profiles.json")
+    
+    # Store ranking persisten (hasil dipakai ulang selama versi data sama)
+    RANKING_STORE_PATH = os.getenv("RANKING_STORE_PATH", "rankings.sqlite")
+    RANKING_STORE_MAX_AGE = int(os.getenv("RANKING_STORE_MAX_AGE", "86400"))  # detik; versi data dari jumlah baris tidak menangkap edit di tempat
+    
+    # Pencocokan bertahap (chunked) untuk populasi besar
+    CHUNK_SIZE = 500  # karyawan per partisi (juga batas panjang filter in.(...) REST)
+    CHUNK_TOP_K = 100  # jumlah kandidat teratas yang rincian TV-nya disimpan
+    
+    # Filter populasi kandidat (kohort)
+    MAX_TENURE_MONTHS = 480  # batas atas slider masa kerja; nilai maksimum berarti tanpa batas
 
 # Validasi kunci yang diperlukan
-def validate_config():
-    if not Config.SUPABASE_URL or not Config.SUPABASE_KEY:
+# Dipanggil oleh titik masuk (app.py, layanan tanpa --data-dir), bukan saat import,
+# agar sumber data CSV lokal dapat dipakai tanpa kredensial
+def validate_config(require_supabase=True, require_groq=True):
+    if require_supabase and (not Config.SUPABASE_URL or not Config.SUPABASE_KEY):
         raise ValueError("SUPABASE_URL dan SUPABASE_KEY harus diset di .env")
-    if not Config.GROQ_API_KEY:
-        raise ValueError("GROQ_API_KEY harus diset di .env")
-
-validate_config()
\ No newline at end of file
+    if require_groq and not Config.GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY harus diset di .env")
\ No newline at end of file
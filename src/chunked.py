@@ -0,0 +1,161 @@
+"""
+chunked.py - Pencocokan bertahap (out-of-core) untuk populasi karyawan yang sangat besar
+
+Baseline benchmark dihitung lebih dulu dari baris benchmark saja, lalu karyawan
+diproses per partisi dengan memori terbatas (opsional paralel multi-proses).
+Yang disimpan hanya ringkasan per karyawan dan rincian TV untuk top-K kandidat.
+"""
+import heapq
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from config import Config
+from src import database
+
+# Tabel skor yang dimuat per partisi karyawan
+SCORE_TABLES = ["profiles_psych", "competencies_yearly", "papi_scores"]
+COHORT_TABLES = [table_name for table_name, _ in database.COHORT_DIMENSIONS.values()]
+EMPLOYEE_COLUMNS = ['employee_id', 'fullname', 'company_id', 'directorate_id', 'position_id', 'grade_id']
+
+
+def _load_partition_tables(loader, employee_ids, df_mapping):
+    """Muat tabel skor hanya untuk karyawan dalam partisi"""
+    filters = {'employee_id': list(employee_ids)}
+    tables = {table_name: loader(table_name, filters=filters) for table_name in SCORE_TABLES}
+    tables["dim_talent_mapping"] = df_mapping
+    return tables
+
+
+def _score_partition(task):
+    """
+    Skor satu partisi karyawan terhadap baseline yang sudah tetap
+    Mengembalikan: (ringkasan per karyawan, baris TV untuk top-K partisi)
+    """
+    employee_ids, baseline, df_mapping, year, expected_tvs, top_k, loader = task
+    prepared = database.prepare_source_data(_load_partition_tables(loader, employee_ids, df_mapping))
+    if not prepared:
+        logging.warning(f"Partition of {len(employee_ids)} employees has no score data")
+        return pd.DataFrame(), pd.DataFrame()
+    
+    if year in prepared['years']:
+        scores = database.get_year_scores(prepared, year)
+    else:
+        scores = prepared['base_scores']
+    tv_match_rates = database.score_tv_rows(scores, baseline)
+    _, final_match_df, actual_tvs = database.aggregate_match_rates(tv_match_rates, expected_tvs)
+    summary = pd.merge(final_match_df, actual_tvs[['employee_id', 'data_completeness']], on='employee_id', how='left')
+    
+    top_ids = summary.nlargest(top_k, 'final_match_rate')['employee_id']
+    details = tv_match_rates[tv_match_rates['employee_id'].isin(top_ids)]
+    return summary, details
+
+
+def _run_partitions(tasks, workers):
+    """
+    Jalankan partisi secara berurutan atau di pool proses dengan jumlah task tertunda terbatas
+    Bila konsumen berhenti (mis. dibatalkan), partisi yang belum berjalan dibatalkan
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield _score_partition(task)
+        return
+    
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = set()
+        for task in tasks:
+            pending.add(executor.submit(_score_partition, task))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run_matching_chunked(benchmark_ids: list, loader=None, top_k=Config.CHUNK_TOP_K,
+                         chunk_size=Config.CHUNK_SIZE, workers=1, as_of_year=None, company_ids=None,
+                         progress=None, cancel=None, cohort=None):
+    """
+    Pencocokan bertahap dengan memori terbatas
+    company_ids: batasi populasi ke perusahaan tertentu (benchmark tetap boleh dari mana saja)
+    cohort: filter populasi (lihat database.cohort_filters), didorong ke pemuatan tabel employees
+    progress: callback(dict) per partisi; cancel: CancellationToken yang diperiksa di antara partisi
+    Tahun kompetensi ditentukan dari data benchmark (terbaru atau pada/sebelum as_of_year).
+    Mengembalikan: (ringkasan peringkat semua karyawan, DataFrame hasil lengkap untuk top-K)
+    """
+    logging.info(f"Starting chunked matching for benchmarks: {benchmark_ids} (chunk={chunk_size}, workers={workers})")
+    if not benchmark_ids:
+        logging.warning("No benchmark IDs provided")
+        return pd.DataFrame(), pd.DataFrame()
+    
+    loader = loader or database.load_table
+    df_mapping = loader("dim_talent_mapping")
+    employee_filters = {'company_id': company_ids} if company_ids else {}
+    if cohort:
+        cohort_filter = database.cohort_filters(cohort, {table_name: loader(table_name) for table_name in COHORT_TABLES})
+        if cohort_filter is None:
+            logging.error(f"Cohort {cohort} is empty")
+            return pd.DataFrame(), pd.DataFrame()
+        employee_filters.update(cohort_filter)
+    df_employees = loader("employees", filters=employee_filters or None, columns=EMPLOYEE_COLUMNS)
+    if df_mapping.empty or df_employees.empty:
+        logging.error("Mapping or employee table empty")
+        return pd.DataFrame(), pd.DataFrame()
+    
+    # Baseline benchmark dihitung lebih dulu dari baris benchmark saja
+    benchmark_prepared = database.prepare_source_data(_load_partition_tables(loader, benchmark_ids, df_mapping))
+    if not benchmark_prepared:
+        logging.error("Benchmark score data empty")
+        return pd.DataFrame(), pd.DataFrame()
+    year = database.resolve_year(benchmark_prepared, as_of_year)
+    baseline = database.compute_benchmark_baseline(database.get_year_scores(benchmark_prepared, year), benchmark_ids)
+    expected_tvs = df_mapping['Sub-test'].nunique()
+    
+    employee_ids = df_employees['employee_id'].tolist()
+    partitions_total = -(-len(employee_ids) // chunk_size)
+    tasks = (
+        (employee_ids[start:start + chunk_size], baseline, df_mapping, year, expected_tvs, top_k, loader)
+        for start in range(0, len(employee_ids), chunk_size)
+    )
+    
+    # Hanya ringkasan per karyawan dan heap top-K yang disimpan
+    summaries = []
+    heap = []
+    top_details = {}
+    for partitions_done, (summary, details) in enumerate(_run_partitions(tasks, workers), start=1):
+        database._checkpoint(progress, cancel, stage='matching', step='partition',
+                             partitions_done=partitions_done, partitions_total=partitions_total)
+        if summary.empty:
+            continue
+        summaries.append(summary)
+        candidates = summary[summary['employee_id'].isin(details['employee_id'].unique())]
+        for employee_id, score in zip(candidates['employee_id'], candidates['final_match_rate']):
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, employee_id))
+            elif score > heap[0][0]:
+                _, evicted = heapq.heapreplace(heap, (score, employee_id))
+                top_details.pop(evicted, None)
+            else:
+                continue
+            top_details[employee_id] = details[details['employee_id'] == employee_id]
+    
+    if not summaries:
+        logging.error("No partition produced scores")
+        return pd.DataFrame(), pd.DataFrame()
+    
+    tables = {table_name: loader(table_name) for table_name in ["dim_directorates", "dim_positions", "dim_grades"]}
+    tables["employees"] = df_employees
+    employee_info = database.build_employee_info(tables)
+    
+    summary_df = pd.merge(pd.concat(summaries, ignore_index=True), employee_info, on='employee_id', how='left')
+    summary_df = summary_df.sort_values(['final_match_rate', 'employee_id'], ascending=[False, True]).reset_index(drop=True)
+    summary_df.insert(0, 'rank', range(1, len(summary_df) + 1))
+    
+    top_df = database.assemble_output(pd.concat(top_details.values(), ignore_index=True), expected_tvs, employee_info)
+    logging.info(f"Chunked matching completed: {len(summary_df)} employees ranked, top {len(top_details)} detailed (year {year})")
+    return summary_df, top_df
@@ -4,8 +4,16 @@ database.py - Operasi basis data melalui REST API Supabase
 import pandas as pd
 import numpy as np
 import requests
+import functools
+import hashlib
 import logging
+import operator
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from config import Config
+from src import schema
 
 # Pengaturan logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', filename='app.log', filemode='a')
@@ -16,25 +24,119 @@ headers = {
     "Prefer": "count=exact"
 }
 
-def load_table(table_name, batch_size=1000):
-    """Muat semua data dari tabel Supabase dengan paginasi"""
+# Tabel yang dibutuhkan algoritma pencocokan
+SOURCE_TABLES = [
+    "profiles_psych", "competencies_yearly", "papi_scores", "dim_talent_mapping",
+    "employees", "dim_directorates", "dim_positions", "dim_grades", "dim_divisions", "performance_yearly",
+]
+# Tabel skor per karyawan (dapat dimuat hanya untuk sebagian karyawan)
+SCORE_TABLES = ["profiles_psych", "competencies_yearly", "papi_scores", "performance_yearly"]
+
+# Filter populasi (kohort): nama filter -> (tabel dimensi, kolom kunci di employees)
+COHORT_DIMENSIONS = {
+    'directorate': ("dim_directorates", 'directorate_id'),
+    'grade': ("dim_grades", 'grade_id'),
+    'position': ("dim_positions", 'position_id'),
+    'division': ("dim_divisions", 'division_id'),
+}
+POPULATION_COLUMNS = ['employee_id'] + [key for _, key in COHORT_DIMENSIONS.values()] + ['years_of_service_months']
+FILTER_OPERATORS = {'eq': operator.eq, 'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le}
+
+class OperationCancelled(Exception):
+    """Proses dihentikan karena token pembatalan diaktifkan"""
+
+class CancellationToken:
+    """Token pembatalan kooperatif; diperiksa di antara halaman tabel dan tahap pencocokan"""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise OperationCancelled()
+
+def _checkpoint(progress=None, cancel=None, **event):
+    """Hentikan bila dibatalkan, lalu laporkan progres terstruktur (dict) ke callback"""
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    if progress is not None:
+        progress(event)
+
+def _parse_total_count(content_range):
+    """Jumlah baris total dari header Content-Range PostgREST (mis. '0-999/100500')"""
+    if not content_range or '/' not in content_range:
+        return None
+    total = content_range.rsplit('/', 1)[1]
+    return int(total) if total.isdigit() else None
+
+def _filter_params(filters):
+    """
+    Terjemahkan filter ke parameter PostgREST
+    {kolom: [nilai, ...]} -> in.(...); {kolom: {'gte': a, 'lte': b}} -> gte.a & lte.b
+    """
+    params = {}
+    for column, values in (filters or {}).items():
+        if isinstance(values, dict):
+            params[column] = [f"{op}.{value}" for op, value in values.items()]
+            continue
+        quoted = ",".join(f'"{value}"' for value in values)
+        params[column] = f"in.({quoted})"
+    return params
+
+def apply_filters(df: pd.DataFrame, filters):
+    """Terapkan filter berformat _filter_params secara lokal (nilai kosong tidak lolos filter operator)"""
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in (filters or {}).items():
+        if isinstance(values, dict):
+            for op, value in values.items():
+                mask &= FILTER_OPERATORS[op](df[column], value).fillna(False).to_numpy(dtype=bool)
+        elif pd.api.types.is_numeric_dtype(df[column]):
+            wanted = pd.to_numeric(pd.Series(list(values), dtype=object), errors='coerce').dropna()
+            mask &= df[column].isin(wanted).fillna(False).to_numpy(dtype=bool)
+        else:
+            mask &= df[column].astype(str).isin([str(value) for value in values]).to_numpy()
+    return df[mask]
+
+def load_table(table_name, batch_size=1000, filters=None, columns=None, progress=None, cancel=None):
+    """
+    Muat semua data dari tabel Supabase dengan paginasi
+    filters: {kolom: [nilai, ...]} disaring di sisi server; columns: daftar kolom yang diambil
+    progress: callback(dict) per halaman; cancel: CancellationToken yang diperiksa sebelum tiap halaman
+    """
     all_data = []
     offset = 0
+    pages_total = None
     
     while True:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        
         url = f"{Config.SUPABASE_URL}/rest/v1/{table_name}"
-        params = {"select": "*", "limit": batch_size, "offset": offset}
+        params = {"select": ",".join(columns) if columns else "*", "limit": batch_size, "offset": offset}
+        params.update(_filter_params(filters))
         
         try:
             response = requests.get(url, headers=headers, params=params, timeout=30)
             response.raise_for_status()
             batch = response.json()
             
+            if pages_total is None:
+                total_rows = _parse_total_count(response.headers.get('Content-Range'))
+                pages_total = -(-total_rows // batch_size) if total_rows is not None else None
+            
             if not batch:
                 break
                 
             all_data.extend(batch)
             offset += len(batch)
+            _checkpoint(progress, None, stage='loading', table=table_name, rows=len(all_data),
+                        pages_done=-(-len(all_data) // batch_size), pages_total=pages_total)
             
             if len(batch) < batch_size:
                 break
@@ -44,7 +146,22 @@ def load_table(table_name, batch_size=1000):
             return pd.DataFrame()
     
     logging.info(f"Loaded table {table_name} with {len(all_data)} rows")
-    return pd.DataFrame(all_data)
+    return schema.apply_schema(table_name, pd.DataFrame(all_data))
+
+def table_fingerprint(table_name):
+    """
+    Sidik tabel Supabase tanpa mengunduh isinya: jumlah baris dari header Content-Range
+    (satu request limit=1). Mengembalikan None bila gagal
+    """
+    url = f"{Config.SUPABASE_URL}/rest/v1/{table_name}"
+    try:
+        response = requests.get(url, headers=headers, params={"select": "*", "limit": 1}, timeout=30)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Error fingerprinting table {table_name}: {str(e)}")
+        return None
+    total_rows = _parse_total_count(response.headers.get('Content-Range'))
+    return None if total_rows is None else f"rows={total_rows}"
 
 def get_employee_list():
     """Dapatkan daftar karyawan untuk dropdown"""
@@ -52,7 +169,7 @@ def get_employee_list():
     if df.empty:
         return pd.DataFrame({'employee_id': [], 'label': []})
     
-    df['label'] = df['fullname'] + " (" + df['employee_id'] + ")"
+    df['label'] = df['fullname'] + " (" + df['employee_id'].astype(str) + ")"
     return df[['employee_id', 'label']].sort_values('label')
 
 def get_role_list():
@@ -62,42 +179,290 @@ def get_role_list():
         return []
     return sorted(df['name'].dropna().unique().tolist())
 
-def run_matching_query(benchmark_ids: list):
+class CsvTableLoader:
     """
-    Algoritma pencocokan inti
-    Mengembalikan: DataFrame dengan hasil pencocokan
+    Sumber data pengganti: membaca tabel dari file CSV (<folder>/<nama_tabel>.csv)
+    Dipakai untuk menjalankan dan menguji aplikasi/layanan secara lokal tanpa Supabase
     """
-    logging.info(f"Starting matching for benchmarks: {benchmark_ids}")
-    if not benchmark_ids:
-        logging.warning("No benchmark IDs provided")
-        return pd.DataFrame()
-    
-    # Muat tabel yang diperlukan
-    df_psych = load_table("profiles_psych")
-    df_comp = load_table("competencies_yearly")
-    df_papi = load_table("papi_scores")
-    df_mapping = load_table("dim_talent_mapping")
-    
-    if any(df.empty for df in [df_psych, df_comp, df_papi, df_mapping]):
-        logging.error("One or more source tables empty")
-        return pd.DataFrame()
-    
-    # Konversi kolom numerik - PAKSA ke numeric dari awal
-    for col in ['iq', 'pauli']:
-        if col in df_psych.columns:
-            df_psych[col] = pd.to_numeric(df_psych[col], errors='coerce').fillna(0.0)
-    
-    df_comp['score'] = pd.to_numeric(df_comp['score'], errors='coerce').fillna(0.0)
-    df_comp['year'] = pd.to_numeric(df_comp['year'], errors='coerce')
-    df_papi['score'] = pd.to_numeric(df_papi['score'], errors='coerce').fillna(0.0)
-    
-    # Dapatkan tahun kompetensi terbaru
-    latest_year = df_comp['year'].max()
-    df_comp_latest = df_comp[df_comp['year'] == latest_year].copy()
-    df_comp_latest.rename(columns={'pillar_code': 'tv_name', 'score': 'tv_value'}, inplace=True)
-    
-    # Gabungkan semua skor
-    scores_list = []
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, table_name, filters=None, columns=None, progress=None, cancel=None):
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        path = os.path.join(self.directory, f"{table_name}.csv")
+        if not os.path.exists(path):
+            logging.warning(f"CSV for table {table_name} not found at {path}")
+            return pd.DataFrame()
+        df = apply_filters(pd.read_csv(path), filters)
+        if columns:
+            df = df[columns]
+        df = schema.apply_schema(table_name, df.reset_index(drop=True))
+        logging.info(f"Loaded table {table_name} from CSV with {len(df)} rows")
+        _checkpoint(progress, None, stage='loading', table=table_name, rows=len(df), pages_done=1, pages_total=1)
+        return df
+
+    def fingerprint(self, table_name):
+        """Sidik file CSV tanpa membacanya: waktu ubah dan ukuran file"""
+        path = os.path.join(self.directory, f"{table_name}.csv")
+        if not os.path.exists(path):
+            return "missing"
+        stat = os.stat(path)
+        return f"mtime={stat.st_mtime_ns};size={stat.st_size}"
+
+def load_tables(table_names, loader=None, progress=None, cancel=None, workers=Config.LOAD_WORKERS):
+    """
+    Muat beberapa tabel secara paralel dengan progres dan pembatalan
+    progress hanya dipanggil dari thread pemanggil (aman untuk UI Streamlit); bila pemanggil
+    berhenti (dibatalkan atau error), worker yang tersisa ikut dihentikan
+    """
+    loader = loader or load_table
+    token = cancel or CancellationToken()
+    events = queue.Queue()
+    tables = {}
+    
+    def report_pending():
+        while not events.empty():
+            _checkpoint(progress, None, **events.get_nowait(), tables_done=len(tables), tables_total=len(table_names))
+    
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="table-loader")
+    try:
+        futures = {
+            executor.submit(loader, table_name, progress=events.put, cancel=token): table_name
+            for table_name in table_names
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            report_pending()
+            for future in done:
+                tables[futures[future]] = future.result()
+                _checkpoint(progress, token, stage='loading', table=futures[future], table_done=True,
+                            tables_done=len(tables), tables_total=len(table_names))
+            token.raise_if_cancelled()
+    except BaseException:
+        token.cancel()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    tables = {table_name: tables[table_name] for table_name in table_names}
+    report = schema.memory_report(tables)
+    logging.info(f"Loaded {len(tables)} tables, {report['memory_mb'].sum():.1f} MB: "
+                 + ", ".join(f"{row.table}={row.memory_mb:.1f}MB" for row in report.itertuples()))
+    return tables
+
+def table_fingerprints(table_names, loader=None, workers=Config.LOAD_WORKERS):
+    """
+    Sidik per tabel tanpa memuat isinya (paralel): jumlah baris REST (table_fingerprint) atau
+    loader.fingerprint. Mengembalikan {tabel: sidik atau None bila gagal}; None bila loader
+    tidak menyediakan fingerprint
+    """
+    if loader is None or loader is load_table:
+        fingerprint = table_fingerprint
+    else:
+        fingerprint = getattr(loader, 'fingerprint', None)
+    if fingerprint is None:
+        return None
+    table_names = sorted(table_names)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="table-fingerprint") as executor:
+        return dict(zip(table_names, executor.map(fingerprint, table_names)))
+
+def source_version(table_names, loader=None, workers=Config.LOAD_WORKERS):
+    """
+    Versi data sumber yang murah dihitung (tanpa memuat tabel): gabungan sidik per tabel.
+    None bila ada tabel yang sidiknya tidak bisa diperoleh atau loader tidak menyediakan fingerprint
+    """
+    fingerprints = table_fingerprints(table_names, loader, workers)
+    if fingerprints is None or any(value is None for value in fingerprints.values()):
+        return None
+    combined = "|".join(f"{name}={value}" for name, value in fingerprints.items())
+    return hashlib.sha1(combined.encode('utf-8')).hexdigest()[:16]
+
+def load_source_data(loader=None, progress=None, cancel=None):
+    """Muat semua tabel sumber pencocokan; loader bawaan adalah REST API Supabase"""
+    return load_tables(SOURCE_TABLES, loader, progress, cancel)
+
+def cohort_filters(cohort: dict, dim_tables: dict):
+    """
+    Terjemahkan kohort ke filter kolom tabel employees
+    cohort: {'directorate': [nama], 'grade': [...], 'position': [...], 'division': [...],
+             'tenure_months': (min, max)}; kunci yang kosong/None tidak menyaring
+    Mengembalikan: dict filter (dapat didorong ke sumber data), atau None bila kohort pasti kosong
+    """
+    filters = {}
+    for name, (table_name, key) in COHORT_DIMENSIONS.items():
+        names = (cohort or {}).get(name)
+        if not names:
+            continue
+        df_dim = dim_tables.get(table_name, pd.DataFrame())
+        ids = df_dim.loc[df_dim['name'].isin(names), key].tolist() if not df_dim.empty else []
+        if not ids:
+            logging.warning(f"Cohort {name} {names} matches no rows in {table_name}")
+            return None
+        filters[key] = ids
+    
+    low, high = (cohort or {}).get('tenure_months') or (None, None)
+    bounds = {op: value for op, value in [('gte', low), ('lte', high)] if value is not None}
+    if bounds:
+        filters['years_of_service_months'] = bounds
+    return filters
+
+def normalize_cohort(cohort):
+    """
+    Validasi dan bentuk kanonik kohort: daftar nama per dimensi diurutkan, tenure_months
+    menjadi [min, max]; kohort tanpa filter menjadi None. Bentuk tidak valid -> ValueError
+    """
+    if cohort is None:
+        return None
+    cohort_keys = set(COHORT_DIMENSIONS) | {'tenure_months'}
+    if not isinstance(cohort, dict) or not set(cohort) <= cohort_keys:
+        raise ValueError(f"cohort must be an object with keys from {sorted(cohort_keys)}")
+    
+    normalized = {}
+    for name in COHORT_DIMENSIONS:
+        names = cohort.get(name)
+        if names is None:
+            continue
+        if not isinstance(names, (list, tuple)) or not all(isinstance(value, str) for value in names):
+            raise ValueError(f"cohort {name} must be a list of names")
+        if names:
+            normalized[name] = sorted(set(names))
+    
+    tenure = cohort.get('tenure_months')
+    if tenure is not None:
+        if (not isinstance(tenure, (list, tuple)) or len(tenure) != 2
+                or not all(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+                           for value in tenure)):
+            raise ValueError("cohort tenure_months must be [min, max] (null for open bounds)")
+        if any(value is not None for value in tenure):
+            normalized['tenure_months'] = list(tenure)
+    return normalized or None
+
+def load_cohort_data(benchmark_ids: list, cohort: dict, loader=None, progress=None, cancel=None):
+    """
+    Muat tabel sumber hanya untuk kohort dan benchmark (benchmark boleh dari luar kohort)
+    Filter kohort didorong ke sumber data; tabel skor dimuat per batch ID karyawan
+    (batas panjang filter in.(...) REST) sehingga beban sebanding dengan ukuran kohort
+    """
+    loader = loader or load_table
+    tables = load_tables(
+        ["dim_talent_mapping"] + [table_name for table_name, _ in COHORT_DIMENSIONS.values()], loader, progress, cancel
+    )
+    filters = cohort_filters(cohort, tables)
+    employee_frames = [loader("employees", filters={'employee_id': list(benchmark_ids)}, cancel=cancel)]
+    if filters is not None:
+        employee_frames.append(loader("employees", filters=filters, cancel=cancel))
+    df_employees = pd.concat(employee_frames, ignore_index=True).drop_duplicates('employee_id')
+    tables["employees"] = df_employees
+    
+    employee_ids = df_employees['employee_id'].astype(str).tolist()
+    batches = [employee_ids[start:start + Config.CHUNK_SIZE] for start in range(0, len(employee_ids), Config.CHUNK_SIZE)]
+    for batch in batches:
+        batch_loader = functools.partial(loader, filters={'employee_id': batch})
+        for table_name, df in load_tables(SCORE_TABLES, batch_loader, progress, cancel).items():
+            tables.setdefault(table_name, []).append(df)
+    for table_name in SCORE_TABLES:
+        tables[table_name] = pd.concat(tables.get(table_name, []) or [pd.DataFrame()], ignore_index=True)
+    
+    logging.info(f"Loaded cohort data for {len(employee_ids)} employees ({len(batches)} batches)")
+    return tables
+
+def select_cohort(prepared: dict, cohort: dict):
+    """ID karyawan dalam kohort dari data sumber yang sudah disiapkan (tanpa I/O)"""
+    filters = cohort_filters(cohort, prepared.get('dimensions', {}))
+    if filters is None or prepared['population'].empty:
+        return []
+    return apply_filters(prepared['population'], filters)['employee_id'].astype(str).tolist()
+
+def build_employee_info(tables: dict):
+    """Gabungkan karyawan dengan dimensi direktorat, posisi, dan grade"""
+    info_columns = ['employee_id', 'fullname', 'directorate', 'role', 'grade']
+    df_employees = tables.get("employees", pd.DataFrame())
+    if df_employees.empty:
+        return pd.DataFrame(columns=info_columns)
+    
+    info = df_employees[['employee_id', 'fullname', 'directorate_id', 'position_id', 'grade_id']].copy()
+    dims = [
+        ("dim_directorates", 'directorate_id', 'directorate'),
+        ("dim_positions", 'position_id', 'role'),
+        ("dim_grades", 'grade_id', 'grade'),
+    ]
+    for table_name, key, label in dims:
+        df_dim = tables.get(table_name, pd.DataFrame())
+        if df_dim.empty:
+            info[label] = np.nan
+            continue
+        info = pd.merge(info, df_dim[[key, 'name']].rename(columns={'name': label}), on=key, how='left')
+    
+    return to_plain_dtypes(info[info_columns])
+
+def latest_ratings(tables: dict):
+    """Rating kinerja tiap karyawan pada tahun terbaru performance_yearly"""
+    df_perf = tables.get("performance_yearly", pd.DataFrame())
+    if df_perf.empty:
+        return pd.DataFrame(columns=['employee_id', 'rating'])
+    
+    latest = df_perf[(df_perf['year'] == df_perf['year'].max()).fillna(False)]
+    ratings = latest[['employee_id']].assign(rating=latest['rating'].astype(float))
+    return to_plain_dtypes(ratings.reset_index(drop=True))
+
+def to_plain_dtypes(df: pd.DataFrame):
+    """
+    Kembalikan kolom kategori ke nilai biasa dan integer nullable (Int8/Int16/...) ke float dengan NaN
+    untuk data yang keluar dari modul ini, sehingga perbandingan seperti rating == 5 bernilai False, bukan <NA>
+    """
+    plain = {col: object for col in df.select_dtypes(include='category').columns}
+    plain.update({
+        col: float for col, dtype in df.dtypes.items()
+        if pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_integer_dtype(dtype)
+    })
+    return df.astype(plain) if plain else df
+
+def _shared_dtype(*columns):
+    """Tipe kategori bersama agar concat/merge antar tabel tetap kategorikal"""
+    categories = columns[0].astype('category').cat.categories
+    for column in columns[1:]:
+        categories = categories.union(column.astype('category').cat.categories)
+    return pd.CategoricalDtype(categories)
+
+def prepare_source_data(tables: dict, progress=None, cancel=None):
+    """
+    Siapkan data sumber sekali agar bisa dipakai ulang untuk banyak set benchmark
+    Mengembalikan: dict berisi skor TV beserta detail mapping dan info karyawan, atau dict kosong
+    """
+    _checkpoint(progress, cancel, stage='preparing')
+    df_psych = tables.get("profiles_psych", pd.DataFrame())
+    df_comp = tables.get("competencies_yearly", pd.DataFrame())
+    df_papi = tables.get("papi_scores", pd.DataFrame())
+    df_employees = tables.get("employees", pd.DataFrame())
+    df_mapping = tables.get("dim_talent_mapping", pd.DataFrame())
+    
+    # Tabel skor yang kosong (mis. partisi tanpa baris PAPI) dilewati; blok skor lain tetap dibangun
+    score_tables = [df for df in [df_psych, df_comp, df_papi] if not df.empty]
+    if df_mapping.empty or not score_tables:
+        logging.error("Mapping table or all score tables empty")
+        return {}
+    
+    # Kolom sudah bertipe sejak dimuat (lihat schema.py); di sini hanya disatukan kategorinya
+    # sehingga baris skor yang panjang menyimpan ID/nama TV sebagai kode kategori
+    employee_dtype = _shared_dtype(*(df['employee_id'] for df in score_tables))
+    tv_dtype = pd.CategoricalDtype(np.sort(df_mapping['Sub-test'].dropna().astype(str).unique()))
+    mapping_columns = df_mapping[['Sub-test', 'Talent Group Variable (TGV)', 'Meaning', 'Behavior Example', 'Note']].astype({
+        'Sub-test': tv_dtype, 'Talent Group Variable (TGV)': 'category', 'Meaning': 'category',
+        'Behavior Example': 'category', 'Note': 'category',
+    })
+    
+    def with_details(scores_df):
+        """Gabungkan skor TV dengan mapping TGV; skor kosong dianggap 0, TV tanpa mapping dibuang"""
+        scores_df = scores_df.astype({'employee_id': employee_dtype, 'tv_name': tv_dtype})
+        scores_df['tv_value'] = scores_df['tv_value'].fillna(0.0).astype(np.float32)
+        merged = pd.merge(scores_df.dropna(subset=['tv_name']), mapping_columns,
+                          left_on='tv_name', right_on='Sub-test', how='inner')
+        return merged.rename(columns={'Talent Group Variable (TGV)': 'tgv_name'})
+    
+    # Skor yang tidak bergantung tahun (psikometri & PAPI)
+    scores_list = [pd.DataFrame(columns=['employee_id', 'tv_value', 'tv_name'])]
     
     if 'iq' in df_psych.columns:
         scores_list.append(
@@ -113,104 +478,159 @@ def run_matching_query(benchmark_ids: list):
             .assign(tv_name='pauli')
         )
     
-    scores_list.append(df_comp_latest[['employee_id', 'tv_name', 'tv_value']].copy())
-    scores_list.append(
-        df_papi[['employee_id', 'scale_code', 'score']].copy()
-        .rename(columns={'scale_code': 'tv_name', 'score': 'tv_value'})
-    )
-    
-    all_scores_df = pd.concat(scores_list, ignore_index=True).dropna(subset=['tv_value'])
-    
-    # PASTIKAN tv_value numerik
-    all_scores_df['tv_value'] = pd.to_numeric(all_scores_df['tv_value'], errors='coerce').fillna(0.0)
-    
-    # Gabung dengan mapping
-    scores_with_details = pd.merge(
-        all_scores_df,
-        df_mapping[['Sub-test', 'Talent Group Variable (TGV)', 'Meaning', 'Behavior Example', 'Note']],
-        left_on='tv_name',
-        right_on='Sub-test',
-        how='inner'
+    if not df_papi.empty:
+        scores_list.append(
+            df_papi[['employee_id', 'scale_code', 'score']]
+            .rename(columns={'scale_code': 'tv_name', 'score': 'tv_value'})
+        )
+    base_scores = with_details(pd.concat(scores_list, ignore_index=True))
+    
+    # Matriks kompetensi semua tahun dibangun dalam satu lintasan tabel
+    if df_comp.empty:
+        df_comp = pd.DataFrame(columns=['employee_id', 'pillar_code', 'year', 'score'])
+    comp_scores = with_details(
+        df_comp.dropna(subset=['year'])[['employee_id', 'pillar_code', 'year', 'score']]
+        .rename(columns={'pillar_code': 'tv_name', 'score': 'tv_value'})
     )
-    scores_with_details.rename(columns={'Talent Group Variable (TGV)': 'tgv_name'}, inplace=True)
+    competency_by_year = {
+        int(year): group.drop(columns='year').reset_index(drop=True)
+        for year, group in comp_scores.groupby('year', sort=True, observed=True)
+    }
+    years = sorted(competency_by_year)
+    
+    logging.info(f"Prepared {len(base_scores)} base and {len(comp_scores)} competency TV rows (years {years})")
+    return {
+        'base_scores': base_scores,
+        'competency_by_year': competency_by_year,
+        'years': years,
+        'latest_year': years[-1] if years else None,
+        'expected_tvs': df_mapping['Sub-test'].nunique(),
+        'employees': build_employee_info(tables),
+        'ratings': latest_ratings(tables),
+        'population': df_employees[[col for col in POPULATION_COLUMNS if col in df_employees.columns]],
+        'dimensions': {table_name: tables.get(table_name, pd.DataFrame()) for table_name, _ in COHORT_DIMENSIONS.values()},
+    }
+
+def resolve_year(prepared: dict, as_of_year=None):
+    """Tahun kompetensi terakhir yang tersedia pada atau sebelum as_of_year (None = terbaru)"""
+    years = prepared.get('years', [])
+    if as_of_year is None:
+        return years[-1] if years else None
+    eligible = [year for year in years if year <= int(as_of_year)]
+    return eligible[-1] if eligible else None
+
+def get_year_scores(prepared: dict, as_of_year=None):
+    """Skor TV (dengan detail mapping) untuk satu tahun kompetensi, tanpa I/O tambahan"""
+    year = resolve_year(prepared, as_of_year)
+    if year is None:
+        logging.warning(f"No competency data on or before {as_of_year}; scoring without competencies")
+        return prepared['base_scores']
+    
+    cache = prepared.setdefault('scores_by_year', {})
+    if year not in cache:
+        cache[year] = pd.concat([prepared['base_scores'], prepared['competency_by_year'][year]], ignore_index=True)
+    return cache[year]
+
+def run_matching_query(benchmark_ids: list, loader=None, as_of_year=None, progress=None, cancel=None, cohort=None):
+    """
+    Algoritma pencocokan inti
+    as_of_year: tahun kompetensi yang dipakai (None = tahun terbaru)
+    progress: callback(dict) untuk progres terstruktur; cancel: CancellationToken
+    cohort: filter populasi (lihat cohort_filters); hanya kohort dan benchmark yang dimuat dan diskor
+    Mengembalikan: DataFrame dengan hasil pencocokan
+    """
+    logging.info(f"Starting matching for benchmarks: {benchmark_ids} (cohort: {cohort})")
+    if not benchmark_ids:
+        logging.warning("No benchmark IDs provided")
+        return pd.DataFrame()
     
-    # Hitung baseline benchmark (median)
+    if cohort:
+        tables = load_cohort_data(benchmark_ids, cohort, loader, progress, cancel)
+    else:
+        tables = load_source_data(loader, progress, cancel)
+    prepared = prepare_source_data(tables, progress, cancel)
+    return compute_matching(prepared, benchmark_ids, as_of_year, progress, cancel)
+
+def compute_benchmark_baseline(scores_with_details, benchmark_ids):
+    """Baseline benchmark per TV (median skor karyawan benchmark)"""
     benchmark_data = scores_with_details[scores_with_details['employee_id'].isin(benchmark_ids)]
-    benchmark_baseline = benchmark_data.groupby('tv_name')['tv_value'].median().reset_index()
+    benchmark_baseline = benchmark_data.groupby('tv_name', observed=True)['tv_value'].median().reset_index()
     benchmark_baseline.rename(columns={'tv_value': 'baseline_score'}, inplace=True)
-    
-    # PAKSA baseline_score ke float
-    benchmark_baseline['baseline_score'] = pd.to_numeric(benchmark_baseline['baseline_score'], errors='coerce').fillna(0.0)
-    
-    # Hitung tingkat pencocokan TV
+    return benchmark_baseline
+
+def score_tv_rows(scores_with_details, benchmark_baseline):
+    """Hitung tingkat pencocokan per baris TV terhadap baseline benchmark"""
     tv_match_rates = pd.merge(scores_with_details, benchmark_baseline, on='tv_name', how='left')
     tv_match_rates.rename(columns={'tv_value': 'user_score'}, inplace=True)
     
-    # PAKSA user_score ke float
-    tv_match_rates['user_score'] = pd.to_numeric(tv_match_rates['user_score'], errors='coerce').fillna(0.0)
-    tv_match_rates['baseline_score'] = pd.to_numeric(tv_match_rates['baseline_score'], errors='coerce').fillna(0.0)
-    
-    # Inisialisasi dengan float eksplisit
-    tv_match_rates['tv_match_rate'] = 0.0
-    
-    # Tangani skala inverse
-    is_inverse = tv_match_rates['Note'].fillna('').str.contains('Inverse Scale', case=False, na=False)
+    # TV tanpa data benchmark tidak punya baseline (skor 0)
+    tv_match_rates['baseline_score'] = tv_match_rates['baseline_score'].fillna(0.0)
+    user = tv_match_rates['user_score'].to_numpy(dtype=float)
+    base = tv_match_rates['baseline_score'].to_numpy(dtype=float)
+    is_inverse = tv_match_rates['Note'].str.contains('Inverse Scale', case=False, na=False).to_numpy(dtype=bool)
     
-    # Skala normal (semakin tinggi semakin baik)
-    mask_normal = ~is_inverse & tv_match_rates['baseline_score'].notna() & (tv_match_rates['baseline_score'] != 0)
-    tv_match_rates.loc[mask_normal, 'tv_match_rate'] = (
-        tv_match_rates.loc[mask_normal, 'user_score'] / 
-        tv_match_rates.loc[mask_normal, 'baseline_score']
-    ) * 100.0
-    
-    # Skala inverse (semakin rendah semakin baik)
-    mask_inverse = is_inverse & tv_match_rates['baseline_score'].notna() & (tv_match_rates['baseline_score'] != 0)
-    user = tv_match_rates.loc[mask_inverse, 'user_score']
-    base = tv_match_rates.loc[mask_inverse, 'baseline_score']
-    inverse_score = 100.0 - (np.maximum(0, user - base) / base) * 100.0
-    tv_match_rates.loc[mask_inverse, 'tv_match_rate'] = np.maximum(0, inverse_score)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Skala normal (semakin tinggi semakin baik)
+        normal_score = user / base * 100.0
+        # Skala inverse (semakin rendah semakin baik)
+        inverse_score = np.maximum(0, 100.0 - (np.maximum(0, user - base) / base) * 100.0)
+    rates = np.where(base != 0, np.where(is_inverse, inverse_score, normal_score), 0.0)
     
     # BERSIHKAN tv_match_rate dari inf/nan
-    tv_match_rates['tv_match_rate'] = tv_match_rates['tv_match_rate'].replace([np.inf, -np.inf], np.nan).fillna(0.0)
-    
+    tv_match_rates['tv_match_rate'] = np.nan_to_num(rates, nan=0.0, posinf=0.0, neginf=0.0)
+    return tv_match_rates
+
+def aggregate_match_rates(tv_match_rates, expected_tvs):
+    """Agregasi tingkat pencocokan TV ke level TGV, skor akhir, dan kelengkapan data"""
     # Hitung kelengkapan data
-    expected_tvs = df_mapping['Sub-test'].nunique()
-    actual_tvs = tv_match_rates.groupby('employee_id')['tv_name'].nunique().reset_index()
+    actual_tvs = tv_match_rates.groupby('employee_id', observed=True)['tv_name'].nunique().reset_index()
     actual_tvs.rename(columns={'tv_name': 'actual_tv_count'}, inplace=True)
     actual_tvs['data_completeness'] = (actual_tvs['actual_tv_count'] / expected_tvs) * 100.0
     
-    # PAKSA data_completeness ke float
-    actual_tvs['data_completeness'] = pd.to_numeric(actual_tvs['data_completeness'], errors='coerce').fillna(0.0)
-    
-    # Agregasi ke level TGV
-    tgv_match_rates = tv_match_rates.groupby(['employee_id', 'tgv_name'])['tv_match_rate'].mean().reset_index()
+    # Agregasi ke level TGV (tv_match_rate sudah bebas inf/nan, jadi rata-ratanya juga)
+    tgv_match_rates = tv_match_rates.groupby(['employee_id', 'tgv_name'], observed=True)['tv_match_rate'].mean().reset_index()
     tgv_match_rates.rename(columns={'tv_match_rate': 'tgv_match_rate'}, inplace=True)
     
-    # PAKSA tgv_match_rate ke float
-    tgv_match_rates['tgv_match_rate'] = pd.to_numeric(tgv_match_rates['tgv_match_rate'], errors='coerce').fillna(0.0)
-    tgv_match_rates['tgv_match_rate'] = tgv_match_rates['tgv_match_rate'].replace([np.inf, -np.inf], np.nan).fillna(0.0)
-    
     # Hitung tingkat pencocokan akhir
-    final_match_df = tgv_match_rates.groupby('employee_id')['tgv_match_rate'].mean().reset_index()
+    final_match_df = tgv_match_rates.groupby('employee_id', observed=True)['tgv_match_rate'].mean().reset_index()
     final_match_df.rename(columns={'tgv_match_rate': 'final_match_rate'}, inplace=True)
+    return tgv_match_rates, final_match_df, actual_tvs
+
+def compute_matching(prepared: dict, benchmark_ids: list, as_of_year=None, progress=None, cancel=None, cohort=None):
+    """
+    Hitung pencocokan dari data sumber yang sudah disiapkan (tanpa memuat ulang tabel)
+    cohort: filter populasi; baris di luar kohort dibuang sebelum diskor (benchmark tetap disertakan)
+    Mengembalikan: DataFrame dengan hasil pencocokan
+    """
+    if not prepared or not benchmark_ids:
+        return pd.DataFrame()
     
-    # PAKSA final_match_rate ke float
-    final_match_df['final_match_rate'] = pd.to_numeric(final_match_df['final_match_rate'], errors='coerce').fillna(0.0)
-    final_match_df['final_match_rate'] = final_match_df['final_match_rate'].replace([np.inf, -np.inf], np.nan).fillna(0.0)
+    _checkpoint(progress, cancel, stage='matching', step='baseline')
+    scores = get_year_scores(prepared, as_of_year)
+    benchmark_baseline = compute_benchmark_baseline(scores, benchmark_ids)
+    if cohort:
+        population = select_cohort(prepared, cohort) + list(benchmark_ids)
+        scores = scores[scores['employee_id'].isin(population)]
+        logging.info(f"Cohort {cohort}: scoring {scores['employee_id'].nunique()} employees")
     
-    # Gabung semua informasi
-    df_employees = load_table("employees")
-    df_direct = load_table("dim_directorates")
-    df_pos = load_table("dim_positions")
-    df_grades = load_table("dim_grades")
+    _checkpoint(progress, cancel, stage='matching', step='scoring')
+    tv_match_rates = score_tv_rows(scores, benchmark_baseline)
     
+    _checkpoint(progress, cancel, stage='matching', step='assembling')
+    final_df = assemble_output(tv_match_rates, prepared['expected_tvs'], prepared['employees'])
+    
+    logging.info(f"Matching completed with {len(final_df)} rows")
+    return final_df
+
+def assemble_output(tv_match_rates, expected_tvs, employee_info):
+    """Gabungkan tingkat pencocokan TV/TGV/akhir dengan info karyawan ke format hasil"""
+    tgv_match_rates, final_match_df, actual_tvs = aggregate_match_rates(tv_match_rates, expected_tvs)
+    
+    # Gabung semua informasi
     final_df = pd.merge(tv_match_rates, tgv_match_rates, on=['employee_id', 'tgv_name'], how='left')
     final_df = pd.merge(final_df, final_match_df, on='employee_id', how='left')
     final_df = pd.merge(final_df, actual_tvs[['employee_id', 'data_completeness']], on='employee_id', how='left')
-    final_df = pd.merge(final_df, df_employees[['employee_id', 'fullname', 'directorate_id', 'position_id', 'grade_id']], on='employee_id', how='left')
-    final_df = pd.merge(final_df, df_direct[['directorate_id', 'name']].rename(columns={'name': 'directorate'}), on='directorate_id', how='left')
-    final_df = pd.merge(final_df, df_pos[['position_id', 'name']].rename(columns={'name': 'role'}), on='position_id', how='left')
-    final_df = pd.merge(final_df, df_grades[['grade_id', 'name']].rename(columns={'name': 'grade'}), on='grade_id', how='left')
+    final_df = pd.merge(final_df, employee_info, on='employee_id', how='left')
     
     # Pilih dan urutkan kolom
     output_columns = [
@@ -220,20 +640,13 @@ def run_matching_query(benchmark_ids: list):
         'final_match_rate', 'data_completeness'
     ]
     
-    final_df = final_df[[col for col in output_columns if col in final_df.columns]].copy()
+    final_df = to_plain_dtypes(final_df[[col for col in output_columns if col in final_df.columns]])
     final_df.rename(columns={'Sub-test': 'tv_name'}, inplace=True)
     
+    # Skor disimpan float32 di data sumber; hasil tetap float64 (nilai sudah bebas inf/nan)
     numeric_columns = ['baseline_score', 'user_score', 'tv_match_rate', 
                        'tgv_match_rate', 'final_match_rate', 'data_completeness']
-    
-    for col in numeric_columns:
-        if col in final_df.columns:
-            # Paksa konversi ke numeric
-            final_df[col] = pd.to_numeric(final_df[col], errors='coerce')
-            # Replace inf dengan NaN
-            final_df[col] = final_df[col].replace([np.inf, -np.inf], np.nan)
-            # Isi NaN dengan 0 untuk keamanan visualisasi
-            final_df[col] = final_df[col].fillna(0.0)
+    final_df = final_df.astype({col: float for col in numeric_columns if col in final_df.columns})
     
     # Log data types untuk debugging
     logging.info(f"Final data types: {final_df[numeric_columns].dtypes.to_dict()}")
@@ -245,6 +658,82 @@ def run_matching_query(benchmark_ids: list):
         inplace=True,
         na_position='last'
     )
-    
-    logging.info(f"Matching completed with {len(final_df)} rows")
     return final_df
+
+def compute_matching_years(prepared: dict, benchmark_ids: list, years=None):
+    """
+    Skor akhir per karyawan untuk beberapa tahun kompetensi sekaligus
+    years: list tahun atau tuple (awal, akhir); None = semua tahun yang tersedia
+    Mengembalikan: DataFrame (employee_id, year, final_match_rate, data_completeness, delta_vs_prev_year)
+    """
+    if not prepared or not benchmark_ids:
+        return pd.DataFrame()
+    
+    available = prepared['years']
+    if years is None:
+        selected = available
+    elif isinstance(years, tuple) and len(years) == 2:
+        selected = [year for year in available if years[0] <= year <= years[1]]
+    else:
+        requested = {int(year) for year in years}
+        selected = [year for year in available if year in requested]
+    
+    yearly = []
+    for year in selected:
+        scores = get_year_scores(prepared, year)
+        tv_match_rates = score_tv_rows(scores, compute_benchmark_baseline(scores, benchmark_ids))
+        _, final_match_df, actual_tvs = aggregate_match_rates(tv_match_rates, prepared['expected_tvs'])
+        summary = pd.merge(final_match_df, actual_tvs[['employee_id', 'data_completeness']], on='employee_id', how='left')
+        yearly.append(summary.assign(year=year))
+    
+    if not yearly:
+        logging.warning(f"No competency years available for range {years}")
+        return pd.DataFrame()
+    
+    yearly_df = to_plain_dtypes(pd.concat(yearly, ignore_index=True)).sort_values(['employee_id', 'year'])
+    yearly_df['delta_vs_prev_year'] = yearly_df.groupby('employee_id')['final_match_rate'].diff()
+    yearly_df = pd.merge(yearly_df, prepared['employees'], on='employee_id', how='left')
+    
+    logging.info(f"Yearly matching completed for years {selected} with {len(yearly_df)} rows")
+    return yearly_df.reset_index(drop=True)
+
+def score_trends(yearly_df: pd.DataFrame):
+    """
+    Ringkas lintasan skor per karyawan dari hasil compute_matching_years
+    Mengembalikan: DataFrame (employee_id, first_year, last_year, first_score, last_score, delta, slope_per_year, n_years)
+    """
+    if yearly_df.empty:
+        return pd.DataFrame()
+    
+    matrix = yearly_df.pivot_table(index='employee_id', columns='year', values='final_match_rate')
+    years = matrix.columns.to_numpy(dtype=float)
+    values = matrix.to_numpy(dtype=float)
+    observed = ~np.isnan(values)
+    
+    # Indeks tahun pertama/terakhir yang teramati per karyawan
+    first_idx = observed.argmax(axis=1)
+    last_idx = values.shape[1] - 1 - observed[:, ::-1].argmax(axis=1)
+    rows = np.arange(len(values))
+    
+    # Kemiringan regresi linier per baris (vektor), hanya atas tahun yang teramati
+    n_years = observed.sum(axis=1)
+    x = np.where(observed, years, 0.0)
+    y = np.where(observed, values, 0.0)
+    x_mean = x.sum(axis=1) / np.maximum(n_years, 1)
+    y_mean = y.sum(axis=1) / np.maximum(n_years, 1)
+    x_centered = np.where(observed, years - x_mean[:, None], 0.0)
+    denominator = (x_centered ** 2).sum(axis=1)
+    numerator = (x_centered * (y - y_mean[:, None]) * observed).sum(axis=1)
+    slope = np.divide(numerator, denominator, out=np.full(len(values), np.nan), where=denominator > 0)
+    
+    trends = pd.DataFrame({
+        'employee_id': matrix.index,
+        'first_year': years[first_idx].astype(int),
+        'last_year': years[last_idx].astype(int),
+        'first_score': values[rows, first_idx],
+        'last_score': values[rows, last_idx],
+        'slope_per_year': slope,
+        'n_years': n_years,
+    })
+    trends['delta'] = trends['last_score'] - trends['first_score']
+    return trends.sort_values('delta', ascending=False).reset_index(drop=True)
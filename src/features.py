@@ -0,0 +1,272 @@
+"""
+features.py - Feature store bersama untuk aplikasi dan notebook analisis
+
+Tabel sumber dimuat sekali per proses dan diberi versi (hash isi). Matriks fitur
+karyawan dibangun per blok; tiap blok di-cache di disk dengan kunci versi tabel
+masukannya, sehingga hanya blok yang tabelnya berubah yang dibangun ulang.
+"""
+import glob
+import hashlib
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from src import database
+
+FEATURE_TABLES = [
+    "employees", "dim_grades", "dim_education", "dim_positions", "dim_departments", "dim_majors",
+    "dim_directorates", "performance_yearly", "competencies_yearly", "strengths", "profiles_psych", "papi_scores",
+]
+TARGET_COLUMNS = ['rating', 'is_top_performer']
+# Kolom deskriptif yang ikut di matriks tetapi bukan fitur model faktor pendorong kinerja
+NON_FEATURE_COLUMNS = ['fullname', 'position', 'directorate'] + TARGET_COLUMNS
+
+
+def table_version(df: pd.DataFrame):
+    """Versi tabel berdasarkan hash isi (baris & kolom)"""
+    if df.empty:
+        return "empty"
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(hashes.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _dim_names(tables, table_name, key, label):
+    """Nama dimensi diindeks oleh kunci dimensi"""
+    df_dim = tables[table_name]
+    if df_dim.empty:
+        return pd.Series(dtype=object, name=label)
+    return df_dim.set_index(key)['name'].rename(label)
+
+
+def _build_demographics(tables):
+    df = tables["employees"].set_index('employee_id')
+    block = pd.DataFrame(index=df.index)
+    block['fullname'] = df['fullname']
+    block['grade'] = df['grade_id'].map(_dim_names(tables, "dim_grades", 'grade_id', 'grade')).astype('category')
+    block['years_of_service_months'] = df['years_of_service_months'].astype(np.float32)
+    dims = [
+        ("dim_education", 'education_id', 'education'),
+        ("dim_departments", 'department_id', 'department'),
+        ("dim_majors", 'major_id', 'major'),
+        ("dim_positions", 'position_id', 'position'),
+        ("dim_directorates", 'directorate_id', 'directorate'),
+    ]
+    for table_name, key, label in dims:
+        block[label] = df[key].map(_dim_names(tables, table_name, key, label)).astype('category')
+    return block
+
+
+def _build_performance(tables):
+    ratings = database.latest_ratings(tables).drop_duplicates('employee_id').set_index('employee_id')
+    block = pd.DataFrame(index=ratings.index)
+    block['rating'] = ratings['rating'].astype(np.float32)
+    block['is_top_performer'] = ratings['rating'] == Config.TOP_PERFORMER_RATING
+    return block
+
+
+def _build_psych(tables):
+    df = tables["profiles_psych"].set_index('employee_id')
+    block = pd.DataFrame(index=df.index)
+    if 'iq' in df.columns:
+        block['iq'] = df['iq'].astype(np.float32)
+    if 'mbti' in df.columns:
+        block['mbti'] = df['mbti'].str.upper().str.strip().astype('category')
+    if 'disc' in df.columns:
+        block['disc'] = df['disc'].astype('category')
+    return block
+
+
+def _pivot_scores(df, columns):
+    """Pivot skor per karyawan; observed=True agar kategori yang tidak muncul tidak menjadi baris/kolom kosong"""
+    block = df.pivot_table(index='employee_id', columns=columns, values='score', aggfunc='mean', observed=True)
+    block.columns = [str(name) for name in block.columns]
+    return block.astype(np.float32)
+
+
+def _build_competencies(tables):
+    # Rata-rata skor per pilar atas semua tahun penilaian
+    return _pivot_scores(tables["competencies_yearly"], 'pillar_code')
+
+
+def _build_papi(tables):
+    return _pivot_scores(tables["papi_scores"], 'scale_code')
+
+
+def _build_strengths(tables):
+    # Jumlah kemunculan tiap tema di 5 peringkat teratas
+    df_strengths = tables["strengths"]
+    top5 = df_strengths[(df_strengths['rank'] <= 5).fillna(False)]
+    block = top5.groupby(['employee_id', 'theme'], observed=True).size().unstack(fill_value=0)
+    block.columns = [f"strength_{theme}" for theme in block.columns]
+    return block.astype(np.uint8)
+
+
+# Versi definisi blok; naikkan bila isi/nama kolom blok berubah agar cache disk lama tidak dipakai
+BLOCK_FORMAT_VERSION = 2
+
+# Blok fitur: nama -> (tabel masukan, fungsi pembangun)
+FEATURE_BLOCKS = {
+    'demographics': (["employees", "dim_grades", "dim_education", "dim_positions", "dim_departments",
+                      "dim_majors", "dim_directorates"], _build_demographics),
+    'performance': (["performance_yearly"], _build_performance),
+    'psych': (["profiles_psych"], _build_psych),
+    'strengths': (["strengths"], _build_strengths),
+    'competencies': (["competencies_yearly"], _build_competencies),
+    'papi': (["papi_scores"], _build_papi),
+}
+
+
+class FeatureStore:
+    """Snapshot tabel bersama (ber-versi) dan matriks fitur karyawan yang di-cache per blok"""
+    def __init__(self, loader=None, cache_dir=Config.FEATURE_CACHE_DIR):
+        self._loader = loader or database.load_table
+        self.cache_dir = cache_dir
+        self.tables = {}
+        self.table_versions = {}
+        self.table_fingerprints = {}
+        self.loaded_at = {}
+        self._feature_matrix = None
+        self._matrix_key = None
+
+    def load_tables(self, table_names=None, refresh=False, progress=None, cancel=None, max_age=Config.CACHE_TTL):
+        """
+        Muat tabel yang belum ada di snapshot dan hitung versinya
+        refresh=True hanya memuat ulang tabel yang sidiknya (database.table_fingerprints) berubah atau
+        tidak diketahui, atau yang dimuat lebih dari max_age detik lalu (sidik jumlah baris tidak
+        menangkap edit di tempat); progress/cancel diteruskan ke database.load_tables
+        """
+        table_names = table_names or FEATURE_TABLES
+        fingerprints = (database.table_fingerprints(table_names, self._loader) or {}) if refresh else {}
+        now = time.time()
+
+        def stale(table_name):
+            fingerprint = fingerprints.get(table_name)
+            return (fingerprint is None or fingerprint != self.table_fingerprints.get(table_name)
+                    or now - self.loaded_at[table_name] > max_age)
+
+        reload = [name for name in table_names if name not in self.tables or (refresh and stale(name))]
+        if reload:
+            loaded = database.load_tables(reload, self._loader, progress, cancel)
+            for table_name, df in loaded.items():
+                self.tables[table_name] = df
+                self.table_versions[table_name] = table_version(df)
+                self.table_fingerprints[table_name] = fingerprints.get(table_name)
+                self.loaded_at[table_name] = time.time()
+        return {table_name: self.tables[table_name] for table_name in table_names}
+
+    def data_version(self, table_names=None):
+        """Versi gabungan dari tabel-tabel yang dipakai"""
+        table_names = sorted(table_names or self.table_versions)
+        combined = "|".join(f"{name}={self.table_versions.get(name, 'missing')}" for name in table_names)
+        return hashlib.sha1(combined.encode('utf-8')).hexdigest()[:16]
+
+    def _block_path(self, block_name, version):
+        return os.path.join(self.cache_dir, f"{block_name}-{version}.pkl")
+
+    def _load_block(self, block_name):
+        """Ambil blok dari cache disk bila versi tabel masukannya sama, jika tidak bangun ulang"""
+        input_tables, builder = FEATURE_BLOCKS[block_name]
+        version = f"v{BLOCK_FORMAT_VERSION}-{self.data_version(input_tables)}"
+        path = self._block_path(block_name, version)
+        if os.path.exists(path):
+            return pd.read_pickle(path)
+
+        tables = self.load_tables(input_tables)
+        if tables[input_tables[0]].empty:
+            logging.warning(f"Feature block {block_name} skipped: table {input_tables[0]} empty")
+            return pd.DataFrame()
+        block = builder(tables)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for stale_path in glob.glob(self._block_path(block_name, '*')):
+            os.remove(stale_path)
+        block.to_pickle(path)
+        logging.info(f"Built feature block {block_name} ({block.shape[0]} x {block.shape[1]}, version {version})")
+        return block
+
+    def feature_matrix(self, refresh=False):
+        """
+        Matriks fitur karyawan bertipe (kategori, float32, uint8), diindeks employee_id: demografi
+        (grade, pendidikan, departemen, jurusan, masa kerja), rating terbaru, iq/mbti/disc, jumlah tema
+        strength peringkat 1-5, rata-rata kompetensi semua tahun dan PAPI
+        refresh=True memuat ulang tabel yang berubah; hanya blok dengan versi tabel berubah yang dibangun ulang
+        """
+        self.load_tables(refresh=refresh)
+        key = self.data_version(FEATURE_TABLES)
+        if self._feature_matrix is not None and key == self._matrix_key:
+            return self._feature_matrix
+
+        blocks = [self._load_block(block_name) for block_name in FEATURE_BLOCKS]
+        matrix = blocks[0]
+        for block in blocks[1:]:
+            if not block.empty:
+                # Blok di-cache per versi tabelnya sendiri; samakan kategori employee_id sebelum join
+                block.index = block.index.astype(matrix.index.dtype)
+                matrix = matrix.join(block[block.index.notna()], how='left')
+
+        strength_columns = [col for col in matrix.columns if col.startswith('strength_')]
+        matrix[strength_columns] = matrix[strength_columns].fillna(0).astype(np.uint8)
+        matrix.index.name = 'employee_id'
+
+        self._feature_matrix, self._matrix_key = matrix, key
+        logging.info(f"Feature matrix ready: {matrix.shape[0]} employees x {matrix.shape[1]} columns (version {key})")
+        return matrix
+
+
+def model_inputs(features: pd.DataFrame):
+    """Pisahkan fitur (X) dan target top performer (y); karyawan tanpa rating terbaru bukan top performer"""
+    X = features.drop(columns=[col for col in NON_FEATURE_COLUMNS if col in features.columns])
+    # Kategori dikonversi ke object agar imputer/encoder scikit-learn menerimanya
+    X = X.astype({col: object for col in X.select_dtypes(include='category').columns})
+    return X, features['is_top_performer'].eq(True)
+
+
+def _build_model(X, n_estimators, n_jobs, random_state):
+    """Pipeline preprocessing + RandomForest seperti pada notebook analisis"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    categorical_features = X.select_dtypes(include=['object', 'category']).columns
+    numerical_features = X.select_dtypes(include=np.number).columns
+
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore'))
+    ])
+    preprocessor = ColumnTransformer(transformers=[
+        ('num', SimpleImputer(strategy='median'), numerical_features),
+        ('cat', categorical_transformer, categorical_features)
+    ])
+    classifier = RandomForestClassifier(
+        n_estimators=n_estimators, random_state=random_state, class_weight='balanced', n_jobs=n_jobs
+    )
+    return Pipeline(steps=[('preprocessor', preprocessor), ('classifier', classifier)]), numerical_features, categorical_features
+
+
+def train_top_performer_model(features: pd.DataFrame, n_estimators=100, n_jobs=-1, random_state=42):
+    """
+    Latih model top performer pada matriks fitur yang di-cache (paralel dengan n_jobs worker)
+    Mengembalikan: (model, DataFrame feature importance terurut)
+    """
+    X, y = model_inputs(features)
+    model, numerical_features, categorical_features = _build_model(X, n_estimators, n_jobs, random_state)
+    model.fit(X, y)
+
+    encoder = model.named_steps['preprocessor'].named_transformers_['cat']['onehot']
+    feature_names = numerical_features.tolist() + list(encoder.get_feature_names_out(categorical_features))
+    importance_df = pd.DataFrame({
+        'feature': feature_names,
+        'importance': model.named_steps['classifier'].feature_importances_
+    }).sort_values('importance', ascending=False).reset_index(drop=True)
+
+    logging.info(f"Trained top performer model on {len(X)} employees, {len(feature_names)} features")
+    return model, importance_df
@@ -0,0 +1,123 @@
+"""
+ranking_store.py - Penyimpanan persisten hasil ranking (SQLite) per peran dan set benchmark
+
+Setiap hasil pencocokan disimpan bersama kunci yang menghasilkannya: nama peran,
+set benchmark (terurut), tahun kompetensi, kohort (filter populasi) dan versi data sumber. Aplikasi membaca
+hasil dari store bila kuncinya cocok dan hanya menghitung ulang saat data berubah.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from config import Config
+from src import database
+
+
+def _year(as_of_year):
+    return None if as_of_year is None else int(as_of_year)
+
+
+def ranking_key(role_name, benchmark_ids, as_of_year, data_version, cohort=None):
+    """Kunci hasil ranking; urutan benchmark dan urutan nama dalam kohort tidak berpengaruh"""
+    payload = json.dumps([role_name, sorted(map(str, benchmark_ids)), _year(as_of_year), data_version,
+                          database.normalize_cohort(cohort)],
+                         sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class RankingStore:
+    """Hasil ranking (ringkasan + rincian TGV/TV) yang dimaterialisasi di SQLite"""
+    def __init__(self, path=Config.RANKING_STORE_PATH):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ranking_runs (
+                    run_key TEXT PRIMARY KEY,
+                    role_name TEXT NOT NULL,
+                    benchmark_ids TEXT NOT NULL,
+                    as_of_year INTEGER,
+                    data_version TEXT NOT NULL,
+                    n_employees INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ranking_runs_role ON ranking_runs (role_name)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, role_name, benchmark_ids, as_of_year, data_version, cohort=None, max_age=Config.RANKING_STORE_MAX_AGE):
+        """Hasil ranking tersimpan untuk kunci ini, atau DataFrame kosong bila belum ada atau lebih tua dari max_age detik"""
+        key = ranking_key(role_name, benchmark_ids, as_of_year, data_version, cohort)
+        min_created_at = time.time() - max_age if max_age else 0
+        try:
+            with closing(self._connect()) as conn:
+                run = conn.execute(
+                    "SELECT 1 FROM ranking_runs WHERE run_key = ? AND created_at >= ?", (key, min_created_at)
+                ).fetchone()
+                if run is None:
+                    return pd.DataFrame()
+                results = pd.read_sql_query(
+                    "SELECT * FROM ranking_results WHERE run_key = ? ORDER BY row_order", conn, params=(key,)
+                )
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            logging.error(f"Error reading ranking store: {str(e)}")
+            return pd.DataFrame()
+        logging.info(f"Ranking store hit for role {role_name} ({len(results)} rows)")
+        return results.drop(columns=['run_key', 'row_order'])
+
+    def put(self, role_name, benchmark_ids, as_of_year, data_version, results_df: pd.DataFrame, cohort=None):
+        """Simpan hasil ranking (menimpa kunci yang sama) dan hapus hasil dari versi data lama"""
+        if results_df.empty:
+            return
+        key = ranking_key(role_name, benchmark_ids, as_of_year, data_version, cohort)
+        rows = results_df.reset_index(drop=True)
+        rows.insert(0, 'row_order', rows.index)
+        rows.insert(0, 'run_key', key)
+        try:
+            with closing(self._connect()) as conn, conn:
+                self._delete_runs(conn, "run_key = ? OR data_version != ?", (key, data_version))
+                conn.execute(
+                    "INSERT INTO ranking_runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, role_name, json.dumps(sorted(map(str, benchmark_ids))), _year(as_of_year), data_version,
+                     int(results_df['employee_id'].nunique()), time.time())
+                )
+                rows.to_sql('ranking_results', conn, if_exists='append', index=False)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_ranking_results_key ON ranking_results (run_key, row_order)")
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            logging.error(f"Error writing ranking store: {str(e)}")
+            return
+        logging.info(f"Stored ranking for role {role_name} ({len(rows)} rows, data version {data_version})")
+
+    def _delete_runs(self, conn, where, params):
+        keys = [row[0] for row in conn.execute(f"SELECT run_key FROM ranking_runs WHERE {where}", params)]
+        if not keys:
+            return
+        placeholders = ",".join("?" * len(keys))
+        has_results = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ranking_results'"
+        ).fetchone()
+        if has_results:
+            conn.execute(f"DELETE FROM ranking_results WHERE run_key IN ({placeholders})", keys)
+        conn.execute(f"DELETE FROM ranking_runs WHERE run_key IN ({placeholders})", keys)
+
+    def list_runs(self, role_name=None):
+        """Daftar hasil ranking tersimpan (terbaru dulu), opsional untuk satu peran"""
+        query = "SELECT role_name, benchmark_ids, as_of_year, data_version, n_employees, created_at FROM ranking_runs"
+        params = ()
+        if role_name:
+            query += " WHERE role_name = ?"
+            params = (role_name,)
+        try:
+            with closing(self._connect()) as conn:
+                runs = pd.read_sql_query(query + " ORDER BY created_at DESC", conn, params=params)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            logging.error(f"Error listing ranking store: {str(e)}")
+            return pd.DataFrame()
+        runs['benchmark_ids'] = runs['benchmark_ids'].map(json.loads)
+        return runs
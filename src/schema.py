@@ -0,0 +1,85 @@
+"""
+schema.py - Tipe kolom dari ERD (sql/ERD Paragon TM.sql) untuk lapisan pemuatan data
+
+Kolom diberi tipe sekali saat tabel dimuat: integer di-downcast ke tipe terkecil,
+numeric menjadi float32, dan ID/kode teks menjadi kategori. Tabel yang tidak ada
+di ERD (mis. dim_talent_mapping) dibiarkan apa adanya.
+"""
+import logging
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+TABLE_PATTERN = re.compile(r'CREATE TABLE "(\w+)" \((.*?)\n\);', re.S)
+COLUMN_PATTERN = re.compile(r'^\s*"(\w+)" (\w+)', re.M)
+
+INTEGER_TYPES = {'int', 'integer', 'smallint', 'bigint', 'serial', 'bigserial'}
+FLOAT_TYPES = {'numeric', 'decimal', 'real', 'float', 'double'}
+
+
+@lru_cache(maxsize=None)
+def load_erd_schema(path=Config.ERD_SCHEMA_PATH):
+    """Parse ERD: {tabel: {kolom: tipe SQL}}"""
+    if not os.path.exists(path):
+        logging.warning(f"ERD schema not found at {path}; tables loaded without dtype normalization")
+        return {}
+    with open(path, encoding='utf-8') as f:
+        sql = f.read()
+    return {
+        table_name: {column: sql_type.lower() for column, sql_type in COLUMN_PATTERN.findall(body)}
+        for table_name, body in TABLE_PATTERN.findall(sql)
+    }
+
+
+def _is_category(column, sql_type):
+    """ID dan kode teks (employee_id, scale_code, pillar_code, varchar(n)) disimpan sebagai kategori"""
+    return sql_type == 'varchar' or (sql_type == 'text' and column.endswith(('_id', '_code')))
+
+
+def _downcast_integer(values: pd.Series):
+    """Integer terkecil; kolom dengan nilai kosong memakai integer nullable (Int8/Int16/...) agar ID tetap utuh"""
+    if values.notna().all():
+        return pd.to_numeric(values, downcast='integer')
+    smallest = pd.to_numeric(values.dropna(), downcast='integer').dtype
+    if not np.issubdtype(smallest, np.integer):
+        return values.astype(np.float32)
+    return values.astype(smallest.name.capitalize())
+
+
+def apply_schema(table_name, df: pd.DataFrame):
+    """Beri tipe kolom sesuai ERD (sekali, saat parse); kolom yang tidak dikenal tidak diubah"""
+    columns = load_erd_schema().get(table_name)
+    if not columns or df.empty:
+        return df
+
+    typed = {}
+    for column, sql_type in columns.items():
+        if column not in df.columns:
+            continue
+        if sql_type in INTEGER_TYPES:
+            typed[column] = _downcast_integer(pd.to_numeric(df[column], errors='coerce'))
+        elif sql_type in FLOAT_TYPES:
+            typed[column] = pd.to_numeric(df[column], errors='coerce').astype(np.float32)
+        elif _is_category(column, sql_type):
+            typed[column] = df[column].astype('category')
+    return df.assign(**typed)
+
+
+def memory_report(tables: dict):
+    """Pemakaian memori per tabel (deep): baris, kolom, MB, dan tipe kolom"""
+    rows = []
+    for table_name, df in tables.items():
+        rows.append({
+            'table': table_name,
+            'rows': len(df),
+            'columns': df.shape[1],
+            'memory_mb': df.memory_usage(deep=True).sum() / 1024 ** 2,
+            'dtypes': ", ".join(f"{column}:{dtype}" for column, dtype in df.dtypes.items()),
+        })
+    report = pd.DataFrame(rows, columns=['table', 'rows', 'columns', 'memory_mb', 'dtypes'])
+    return report.sort_values('memory_mb', ascending=False).reset_index(drop=True)
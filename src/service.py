@@ -0,0 +1,407 @@
+"""
+service.py - Layanan HTTP pencocokan dengan data sumber yang tetap hangat di memori
+
+Jalankan:
+    python -m src.service                     # sumber data Supabase
+    python -m src.service --data-dir fixtures # sumber data CSV lokal (<tabel>.csv)
+
+Endpoint:
+    POST /match                         {"benchmark_ids": [...], "page": 1, "page_size": 50, "as_of_year": 2024,
+                                         "cohort": {"directorate": [...], "grade": [...], "tenure_months": [24, null]}}
+    GET  /employee/{id}/breakdown       ?benchmark_ids=EMP1,EMP2&as_of_year=2024
+    GET  /employee/{id}/trend           ?benchmark_ids=EMP1,EMP2&from_year=2022&to_year=2025
+    GET  /metrics                       latensi per endpoint dan statistik cache
+    GET  /health
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+import pandas as pd
+
+from config import Config, validate_config
+from src import database
+
+SUMMARY_COLUMNS = ['employee_id', 'fullname', 'directorate', 'role', 'grade', 'final_match_rate', 'data_completeness']
+BREAKDOWN_COLUMNS = ['tgv_name', 'tv_name', 'Meaning', 'Note', 'baseline_score', 'user_score', 'tv_match_rate', 'tgv_match_rate']
+
+
+class ServiceError(Exception):
+    """Kesalahan request yang dikembalikan ke klien dengan kode status HTTP"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _to_records(df: pd.DataFrame):
+    """Konversi DataFrame ke list dict yang aman untuk JSON (NaN -> null)"""
+    return json.loads(df.to_json(orient='records'))
+
+
+def _int_param(query, name):
+    """Ambil parameter query integer opsional"""
+    values = query.get(name)
+    if not values:
+        return None
+    try:
+        return int(values[0])
+    except ValueError:
+        raise ServiceError(400, f"{name} must be an integer")
+
+
+class LatencyMetrics:
+    """Pencatat latensi per endpoint dalam jendela geser"""
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self._samples[endpoint].append(seconds * 1000.0)
+            self._counts[endpoint] += 1
+            if status >= 400:
+                self._errors[endpoint] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for endpoint, samples in self._samples.items():
+                values = np.array(samples, dtype=float)
+                result[endpoint] = {
+                    'count': self._counts[endpoint],
+                    'errors': self._errors[endpoint],
+                    'mean_ms': round(float(values.mean()), 2),
+                    'p50_ms': round(float(np.percentile(values, 50)), 2),
+                    'p95_ms': round(float(np.percentile(values, 95)), 2),
+                    'max_ms': round(float(values.max()), 2),
+                }
+            return result
+
+
+class MatchingService:
+    """
+    Menyimpan data sumber yang sudah disiapkan di memori dan men-cache hasil
+    pencocokan per set benchmark dan tahun (LRU). Request paralel untuk kunci
+    yang sama hanya dihitung sekali.
+    """
+    def __init__(self, loader=None, cache_size=Config.SERVICE_CACHE_SIZE):
+        self._loader = loader
+        self._cache_size = cache_size
+        self._prepared = {}
+        self._loaded_at = None
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0  # request yang menunggu perhitungan yang sedang berjalan
+        self.metrics = LatencyMetrics()
+
+    def warm_up(self):
+        """Muat dan siapkan data sumber; hasil cache lama dibuang"""
+        start = time.perf_counter()
+        prepared = database.prepare_source_data(database.load_source_data(self._loader))
+        if not prepared:
+            raise RuntimeError("Source data could not be prepared")
+        with self._lock:
+            self._prepared = prepared
+            self._loaded_at = time.time()
+            self._cache.clear()
+        logging.info(f"Matching service warmed up in {time.perf_counter() - start:.2f}s")
+
+    @property
+    def is_ready(self):
+        return bool(self._prepared)
+
+    def _get_result(self, benchmark_ids, as_of_year=None, cohort=None):
+        """Hasil pencocokan per set benchmark, tahun kompetensi dan kohort"""
+        ids = tuple(sorted(set(benchmark_ids)))
+        year = database.resolve_year(self._prepared, as_of_year)
+        cohort = database.normalize_cohort(cohort)
+        cohort_key = json.dumps(cohort, sort_keys=True) if cohort else None
+        return self._cached(
+            ('match', ids, year, cohort_key),
+            lambda prepared: database.compute_matching(prepared, list(ids), year, cohort=cohort)
+        )
+
+    def _get_yearly(self, benchmark_ids, year_range):
+        """Skor per tahun kompetensi untuk set benchmark"""
+        ids = tuple(sorted(set(benchmark_ids)))
+        return self._cached(('yearly', ids, year_range), lambda prepared: database.compute_matching_years(prepared, list(ids), year_range))
+
+    def _cached(self, key, compute):
+        """Ambil hasil dari cache LRU atau hitung sekali walau diminta banyak request paralel"""
+        owner = False
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key]
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                self.cache_misses += 1
+                owner = True
+            else:
+                self.coalesced += 1
+            prepared = self._prepared
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = compute(prepared)
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def match(self, benchmark_ids, page=1, page_size=Config.SERVICE_PAGE_SIZE, as_of_year=None, cohort=None):
+        """Peringkat karyawan (satu baris per karyawan) dengan paginasi, opsional dalam satu kohort"""
+        if not self.is_ready:
+            raise ServiceError(503, "Service is warming up")
+        if not isinstance(benchmark_ids, list) or not benchmark_ids or not all(isinstance(b, str) for b in benchmark_ids):
+            raise ServiceError(400, "benchmark_ids must be a non-empty list of employee IDs")
+        if page < 1 or not 1 <= page_size <= Config.SERVICE_MAX_PAGE_SIZE:
+            raise ServiceError(400, f"page must be >= 1 and page_size between 1 and {Config.SERVICE_MAX_PAGE_SIZE}")
+        try:
+            cohort = database.normalize_cohort(cohort)
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+
+        result = self._get_result(benchmark_ids, as_of_year, cohort)
+        if result.empty:
+            raise ServiceError(404, "No matching results for the given benchmarks")
+
+        ranking = result.drop_duplicates(subset=['employee_id'])
+        ranking = ranking[[col for col in SUMMARY_COLUMNS if col in ranking.columns]]
+        start = (page - 1) * page_size
+        page_df = ranking.iloc[start:start + page_size].copy()
+        page_df.insert(0, 'rank', np.arange(start + 1, start + 1 + len(page_df)))
+        return {
+            'benchmark_ids': sorted(set(benchmark_ids)),
+            'competency_year': database.resolve_year(self._prepared, as_of_year),
+            'total': len(ranking),
+            'page': page,
+            'page_size': page_size,
+            'results': _to_records(page_df),
+        }
+
+    def employee_breakdown(self, employee_id, benchmark_ids, as_of_year=None):
+        """Rincian skor TGV/TV satu karyawan terhadap set benchmark"""
+        if not self.is_ready:
+            raise ServiceError(503, "Service is warming up")
+        if not benchmark_ids:
+            raise ServiceError(400, "benchmark_ids query parameter is required")
+
+        result = self._get_result(benchmark_ids, as_of_year)
+        employee_df = result[result['employee_id'] == employee_id] if not result.empty else result
+        if employee_df.empty:
+            raise ServiceError(404, f"Employee {employee_id} not found in matching results")
+
+        first = employee_df.iloc[0]
+        tgv_summary = employee_df.drop_duplicates(subset=['tgv_name'])[['tgv_name', 'tgv_match_rate']]
+        return {
+            'employee_id': employee_id,
+            'fullname': first['fullname'] if pd.notna(first.get('fullname')) else None,
+            'final_match_rate': float(first['final_match_rate']),
+            'data_completeness': float(first['data_completeness']),
+            'tgv': _to_records(tgv_summary),
+            'tv': _to_records(employee_df[[col for col in BREAKDOWN_COLUMNS if col in employee_df.columns]]),
+        }
+
+    def employee_trend(self, employee_id, benchmark_ids, from_year=None, to_year=None):
+        """Skor akhir satu karyawan per tahun kompetensi beserta perubahan antar tahun"""
+        if not self.is_ready:
+            raise ServiceError(503, "Service is warming up")
+        if not benchmark_ids:
+            raise ServiceError(400, "benchmark_ids query parameter is required")
+
+        years = self._prepared['years']
+        year_range = (from_year or years[0], to_year or years[-1]) if years else None
+        yearly = self._get_yearly(benchmark_ids, year_range)
+        employee_df = yearly[yearly['employee_id'] == employee_id] if not yearly.empty else yearly
+        if employee_df.empty:
+            raise ServiceError(404, f"Employee {employee_id} not found in yearly results")
+
+        trend = database.score_trends(employee_df).iloc[0]
+        return {
+            'employee_id': employee_id,
+            'years': _to_records(employee_df[['year', 'final_match_rate', 'data_completeness', 'delta_vs_prev_year']]),
+            'delta': None if pd.isna(trend['delta']) else float(trend['delta']),
+            'slope_per_year': None if pd.isna(trend['slope_per_year']) else float(trend['slope_per_year']),
+        }
+
+    def stats(self):
+        with self._lock:
+            cache_stats = {
+                'entries': len(self._cache),
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'coalesced': self.coalesced,
+            }
+        return {
+            'ready': self.is_ready,
+            'loaded_at': self._loaded_at,
+            'cache': cache_stats,
+            'latency': self.metrics.snapshot(),
+        }
+
+
+class MatchRequestHandler(BaseHTTPRequestHandler):
+    """Routing HTTP ke MatchingService"""
+    server_version = "TalentMatchService/1.0"
+
+    @property
+    def service(self) -> MatchingService:
+        return self.server.service
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        parts = [unquote(p) for p in parsed.path.strip('/').split('/') if p]
+
+        if parts == ['health']:
+            self._dispatch('health', lambda: {'status': 'ok' if self.service.is_ready else 'warming_up'})
+        elif parts == ['metrics']:
+            self._dispatch('metrics', self.service.stats)
+        elif len(parts) == 3 and parts[0] == 'employee' and parts[2] in ('breakdown', 'trend'):
+            query = parse_qs(parsed.query)
+            benchmark_ids = [b for value in query.get('benchmark_ids', []) for b in value.split(',') if b]
+
+            def handle():
+                if parts[2] == 'breakdown':
+                    return self.service.employee_breakdown(parts[1], benchmark_ids, _int_param(query, 'as_of_year'))
+                return self.service.employee_trend(
+                    parts[1], benchmark_ids, _int_param(query, 'from_year'), _int_param(query, 'to_year')
+                )
+
+            self._dispatch(parts[2], handle)
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/match':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        def handle():
+            body = self._read_json()
+            try:
+                page = int(body.get('page', 1))
+                page_size = int(body.get('page_size', Config.SERVICE_PAGE_SIZE))
+                as_of_year = int(body['as_of_year']) if body.get('as_of_year') is not None else None
+            except (TypeError, ValueError):
+                raise ServiceError(400, "page, page_size and as_of_year must be integers")
+            return self.service.match(body.get('benchmark_ids'), page, page_size, as_of_year, body.get('cohort'))
+
+        self._dispatch('match', handle)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            raise ServiceError(400, "Request body must be valid JSON")
+        if not isinstance(body, dict):
+            raise ServiceError(400, "Request body must be a JSON object")
+        return body
+
+    def _dispatch(self, endpoint, handler):
+        start = time.perf_counter()
+        try:
+            status, payload = 200, handler()
+        except ServiceError as e:
+            status, payload = e.status, {'error': str(e)}
+        except Exception as e:
+            logging.error(f"Service error on {endpoint}: {str(e)}")
+            status, payload = 500, {'error': 'Internal server error'}
+        self._send_json(status, payload)
+        self.service.metrics.record(endpoint, time.perf_counter() - start, status)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer yang menangani setiap koneksi di worker pool berukuran tetap"""
+    def __init__(self, server_address, service, workers=Config.SERVICE_WORKERS):
+        super().__init__(server_address, MatchRequestHandler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match-worker")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_in_worker, request, client_address)
+
+    def _process_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def create_server(service, host=Config.SERVICE_HOST, port=Config.SERVICE_PORT, workers=Config.SERVICE_WORKERS):
+    """Buat server HTTP (port=0 memilih port bebas, berguna untuk uji lokal)"""
+    return PooledHTTPServer((host, port), service, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Talent matching HTTP service")
+    parser.add_argument('--host', default=Config.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=Config.SERVICE_PORT)
+    parser.add_argument('--workers', type=int, default=Config.SERVICE_WORKERS)
+    parser.add_argument('--data-dir', help="Folder CSV sebagai pengganti Supabase (<tabel>.csv)")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        loader = database.CsvTableLoader(args.data_dir)
+    else:
+        validate_config(require_groq=False)
+        loader = None
+    service = MatchingService(loader=loader)
+    service.warm_up()
+
+    server = create_server(service, args.host, args.port, args.workers)
+    logging.info(f"Matching service listening on {args.host}:{server.server_port}")
+    print(f"Matching service listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+similarity.py - Pencarian karyawan serupa (nearest neighbour) atas vektor skor TV
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src import database
+
+
+class SimilarityIndex:
+    """
+    Matriks skor TV ternormalisasi (z-score per TV) untuk seluruh karyawan.
+    TV yang hilang diberi nilai 0 dan dicatat di mask, sehingga kemiripan
+    kosinus hanya dihitung atas TV yang dimiliki kedua karyawan.
+    """
+    def __init__(self, employee_ids, tv_names, values, employee_info=None):
+        observed = ~np.isnan(values)
+        means = np.nanmean(values, axis=0)
+        stds = np.nanstd(values, axis=0)
+        stds[~(stds > 0)] = 1.0
+
+        self.employee_ids = np.asarray(employee_ids)
+        self.tv_names = list(tv_names)
+        self.means = means
+        self.stds = stds
+        self.vectors = np.where(observed, (values - means) / stds, 0.0).astype(np.float32)
+        self.squared = self.vectors ** 2
+        self.mask = observed.astype(np.float32)
+        self.employee_info = employee_info
+        self._positions = pd.Series(np.arange(len(self.employee_ids)), index=self.employee_ids)
+
+    @classmethod
+    def from_prepared(cls, prepared: dict, as_of_year=None):
+        """Bangun indeks dari data sumber yang sudah disiapkan (iq/pauli/kompetensi/PAPI)"""
+        if not prepared:
+            return None
+        scores = database.get_year_scores(prepared, as_of_year)
+        matrix = scores.pivot_table(index='employee_id', columns='tv_name', values='tv_value', aggfunc='mean', observed=True)
+        logging.info(f"Similarity index built for {matrix.shape[0]} employees x {matrix.shape[1]} TVs")
+        return cls(matrix.index, matrix.columns, matrix.to_numpy(dtype=np.float64), prepared.get('employees'))
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    def __contains__(self, employee_id):
+        return employee_id in self._positions.index
+
+    def _query(self, vector, mask, k, exclude_ids=(), min_shared=0.5):
+        """Top-k kemiripan kosinus terhadap vektor query (dihitung atas TV bersama saja)"""
+        vector = vector.astype(np.float32)
+        mask = mask.astype(np.float32)
+
+        dot = self.vectors @ vector
+        norm_rows = self.squared @ mask
+        norm_query = self.mask @ (vector ** 2)
+        shared = self.mask @ mask
+
+        denominator = np.sqrt(norm_rows * norm_query)
+        similarity = np.divide(dot, denominator, out=np.full(len(dot), -np.inf, dtype=np.float32), where=denominator > 0)
+
+        # Abaikan karyawan dengan terlalu sedikit TV bersama dan ID yang dikecualikan
+        similarity[shared < min_shared * mask.sum()] = -np.inf
+        excluded = self._positions.reindex(list(exclude_ids)).dropna().astype(int).to_numpy()
+        similarity[excluded] = -np.inf
+
+        k = min(k, int(np.isfinite(similarity).sum()))
+        if k <= 0:
+            return pd.DataFrame(columns=['employee_id', 'similarity', 'shared_tvs'])
+        top = np.argpartition(-similarity, k - 1)[:k]
+        top = top[np.argsort(-similarity[top])]
+
+        result = pd.DataFrame({
+            'employee_id': self.employee_ids[top],
+            'similarity': similarity[top].astype(float),
+            'shared_tvs': shared[top].astype(int),
+        })
+        if self.employee_info is not None and not self.employee_info.empty:
+            result = pd.merge(result, self.employee_info, on='employee_id', how='left')
+        return result
+
+    def query_employee(self, employee_id, k=10, min_shared=0.5):
+        """k karyawan paling mirip dengan karyawan tertentu"""
+        if employee_id not in self:
+            logging.warning(f"Employee {employee_id} not in similarity index")
+            return pd.DataFrame(columns=['employee_id', 'similarity', 'shared_tvs'])
+        position = self._positions[employee_id]
+        return self._query(self.vectors[position], self.mask[position], k, [employee_id], min_shared)
+
+    def query_centroid(self, benchmark_ids, k=10, exclude_benchmarks=True, min_shared=0.5):
+        """k karyawan paling mirip dengan centroid benchmark"""
+        positions = self._positions.reindex(list(benchmark_ids)).dropna().astype(int).to_numpy()
+        if len(positions) == 0:
+            logging.warning(f"None of the benchmarks {benchmark_ids} in similarity index")
+            return pd.DataFrame(columns=['employee_id', 'similarity', 'shared_tvs'])
+
+        counts = self.mask[positions].sum(axis=0)
+        centroid = np.divide(self.vectors[positions].sum(axis=0), counts, out=np.zeros_like(counts), where=counts > 0)
+        exclude_ids = benchmark_ids if exclude_benchmarks else ()
+        return self._query(centroid, (counts > 0), k, exclude_ids, min_shared)
@@ -0,0 +1,91 @@
+"""
+suggestions.py - Saran karyawan benchmark per posisi/grade dari top performer
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+from src.similarity import SimilarityIndex
+
+SUGGESTION_COLUMNS = ['role', 'grade', 'employee_id', 'fullname', 'distance', 'suggestion_rank']
+
+
+def _cohort_distances(index, cohort_codes, rows):
+    """
+    Jarak RMS (atas TV yang teramati) tiap baris indeks ke centroid kohortnya
+    cohort_codes: kode kohort untuk setiap baris indeks; rows: baris yang dihitung jaraknya
+    """
+    n_cohorts = cohort_codes.max() + 1
+    sums = np.zeros((n_cohorts, index.vectors.shape[1]))
+    counts = np.zeros_like(sums)
+    np.add.at(sums, cohort_codes, index.vectors)
+    np.add.at(counts, cohort_codes, index.mask)
+    centroids = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    diff = (index.vectors[rows] - centroids[cohort_codes[rows]]) * index.mask[rows]
+    observed = index.mask[rows].sum(axis=1)
+    return np.sqrt(np.divide((diff ** 2).sum(axis=1), observed, out=np.full(len(rows), np.inf), where=observed > 0))
+
+
+def build_benchmark_suggestions(prepared: dict, similarity_index=None, n=Config.SUGGESTED_BENCHMARKS):
+    """
+    Pilih top performer (rating tertinggi tahun terbaru) yang paling representatif
+    untuk kohortnya: paling dekat ke centroid kohort di ruang TV ternormalisasi.
+    Kohort dihitung per (posisi, grade) dan per posisi saja (grade = None).
+    Mengembalikan: DataFrame saran dengan kolom SUGGESTION_COLUMNS
+    """
+    if not prepared or prepared.get('ratings', pd.DataFrame()).empty:
+        logging.warning("No performance data for benchmark suggestions")
+        return pd.DataFrame(columns=SUGGESTION_COLUMNS)
+
+    index = similarity_index or SimilarityIndex.from_prepared(prepared)
+    info = prepared['employees'].set_index('employee_id').reindex(index.employee_ids)
+    ratings = prepared['ratings'].drop_duplicates('employee_id').set_index('employee_id')['rating'].reindex(index.employee_ids)
+
+    top_rows = np.flatnonzero((ratings == Config.TOP_PERFORMER_RATING).to_numpy() & info['role'].notna().to_numpy())
+    if len(top_rows) == 0:
+        logging.warning("No top performers found for benchmark suggestions")
+        return pd.DataFrame(columns=SUGGESTION_COLUMNS)
+
+    suggestions = []
+    cohort_levels = [
+        info['role'].astype(str) + '|' + info['grade'].astype(str),
+        info['role'].astype(str),
+    ]
+    for level, cohort_keys in enumerate(cohort_levels):
+        cohort_codes, _ = pd.factorize(cohort_keys)
+        distances = _cohort_distances(index, cohort_codes, top_rows)
+        level_df = pd.DataFrame({
+            'role': info['role'].to_numpy()[top_rows],
+            'grade': info['grade'].to_numpy()[top_rows] if level == 0 else None,
+            'employee_id': index.employee_ids[top_rows],
+            'fullname': info['fullname'].to_numpy()[top_rows],
+            'distance': distances,
+        })
+        level_df = level_df.sort_values(['role', 'grade', 'distance'] if level == 0 else ['role', 'distance'])
+        group_keys = ['role', 'grade'] if level == 0 else ['role']
+        level_df['suggestion_rank'] = level_df.groupby(group_keys, dropna=False).cumcount() + 1
+        suggestions.append(level_df[level_df['suggestion_rank'] <= n])
+
+    result = pd.concat(suggestions, ignore_index=True)[SUGGESTION_COLUMNS]
+    logging.info(f"Built {len(result)} benchmark suggestions from {len(top_rows)} top performers")
+    return result
+
+
+def suggest_benchmarks(suggestions: pd.DataFrame, role, grade=None, n=Config.SUGGESTED_BENCHMARKS):
+    """ID benchmark yang disarankan untuk peran (dan grade bila ada), dilengkapi dari level peran"""
+    if suggestions.empty or not role:
+        return []
+
+    role_rows = suggestions[suggestions['role'] == role]
+    picked = []
+    if grade is not None:
+        picked = role_rows[role_rows['grade'] == grade].sort_values('suggestion_rank')['employee_id'].tolist()
+    for employee_id in role_rows[role_rows['grade'].isna()].sort_values('suggestion_rank')['employee_id']:
+        if len(picked) >= n:
+            break
+        if employee_id not in picked:
+            picked.append(employee_id)
+    return picked[:n]
@@ -0,0 +1,144 @@
+"""
+weighting.py - Pembobotan TGV dan skor ulang what-if dari matriks skor yang sudah di-cache
+"""
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import Config
+
+# Kebijakan skala inverse (semakin rendah semakin baik)
+INVERSE_POLICIES = {
+    'penalize_excess': "Penalize only scores above benchmark (default)",
+    'ratio': "Benchmark / score ratio",
+    'exclude': "Exclude inverse-scale TVs",
+}
+DEFAULT_POLICY = 'penalize_excess'
+
+
+def build_score_matrices(results_df: pd.DataFrame):
+    """
+    Ubah hasil pencocokan (format panjang) menjadi matriks karyawan x TV
+    Mengembalikan: dict matriks atau dict kosong bila hasil kosong
+    """
+    if results_df.empty:
+        return {}
+
+    tv_rows = results_df.drop_duplicates(subset=['employee_id', 'tv_name'])
+    user = tv_rows.pivot(index='employee_id', columns='tv_name', values='user_score')
+    employee_ids = user.index
+    tv_names = user.columns
+
+    tv_meta = tv_rows.drop_duplicates(subset=['tv_name']).set_index('tv_name').reindex(tv_names)
+    tgv_names = sorted(tv_meta['tgv_name'].dropna().unique().tolist())
+    membership = (tv_meta['tgv_name'].to_numpy()[:, None] == np.array(tgv_names)[None, :]).astype(float)
+
+    summary = tv_rows.drop_duplicates(subset=['employee_id']).set_index('employee_id').reindex(employee_ids)
+    info_columns = [col for col in ['fullname', 'directorate', 'role', 'grade', 'data_completeness'] if col in summary.columns]
+
+    return {
+        'employee_ids': employee_ids.to_numpy(),
+        'tv_names': list(tv_names),
+        'tgv_names': tgv_names,
+        'user': user.to_numpy(dtype=float),
+        'baseline': tv_meta['baseline_score'].to_numpy(dtype=float),
+        'inverse': tv_meta['Note'].fillna('').str.contains('Inverse Scale', case=False).to_numpy(),
+        'membership': membership,
+        'base_final': summary['final_match_rate'].to_numpy(dtype=float),
+        'info': summary[info_columns].reset_index(),
+    }
+
+
+def tgv_matrix(matrices: dict, cap=None, inverse_policy=DEFAULT_POLICY):
+    """
+    Matriks karyawan x TGV dari skor TV dengan batas (cap) dan kebijakan skala inverse
+    Mengembalikan: (nilai TGV, mask TGV yang tersedia)
+    """
+    user = matrices['user']
+    baseline = matrices['baseline']
+    inverse = matrices['inverse']
+    observed = ~np.isnan(user)
+    valid_base = baseline != 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(valid_base, user / baseline * 100.0, 0.0)
+        if inverse_policy == 'ratio':
+            inverse_rates = np.where(valid_base & (user != 0), baseline / user * 100.0, 0.0)
+        else:
+            inverse_rates = np.maximum(0.0, 100.0 - np.maximum(0.0, user - baseline) / baseline * 100.0)
+            inverse_rates = np.where(valid_base, inverse_rates, 0.0)
+    rates = np.where(inverse, inverse_rates, rates)
+    rates = np.nan_to_num(rates, nan=0.0, posinf=0.0, neginf=0.0)
+    if cap is not None:
+        rates = np.minimum(rates, cap)
+
+    if inverse_policy == 'exclude':
+        observed = observed & ~inverse
+    rates = np.where(observed, rates, 0.0)
+
+    # Rata-rata TV per TGV sebagai perkalian matriks dengan matriks keanggotaan TV -> TGV
+    membership = matrices['membership']
+    tv_counts = observed.astype(float) @ membership
+    tgv_values = np.divide(rates @ membership, tv_counts, out=np.zeros_like(tv_counts), where=tv_counts > 0)
+    return tgv_values, tv_counts > 0
+
+
+def weighted_scores(tgv_values, tgv_mask, weights):
+    """Skor akhir berbobot: rata-rata TGV berbobot atas TGV yang tersedia (perkalian matriks-vektor)"""
+    weights = np.asarray(weights, dtype=float)
+    weight_totals = tgv_mask.astype(float) @ weights
+    return np.divide(np.where(tgv_mask, tgv_values, 0.0) @ weights, weight_totals,
+                     out=np.zeros(len(tgv_values)), where=weight_totals > 0)
+
+
+def rescore(matrices: dict, tgv_weights=None, cap=None, inverse_policy=DEFAULT_POLICY, tgv_values=None, tgv_mask=None):
+    """
+    Peringkat ulang dengan bobot TGV tanpa menjalankan ulang pencocokan
+    tgv_weights: {nama_tgv: bobot}; TGV yang tidak disebut berbobot 1
+    Mengembalikan: DataFrame (employee_id, info, final_match_rate, weighted_match_rate, base_rank, weighted_rank, rank_change)
+    """
+    if not matrices:
+        return pd.DataFrame()
+
+    if tgv_values is None or tgv_mask is None:
+        tgv_values, tgv_mask = tgv_matrix(matrices, cap, inverse_policy)
+    weights = [float((tgv_weights or {}).get(name, 1.0)) for name in matrices['tgv_names']]
+
+    result = matrices['info'].copy()
+    result['final_match_rate'] = matrices['base_final']
+    result['weighted_match_rate'] = weighted_scores(tgv_values, tgv_mask, weights)
+    result['base_rank'] = result['final_match_rate'].rank(ascending=False, method='min').astype(int)
+    result['weighted_rank'] = result['weighted_match_rate'].rank(ascending=False, method='min').astype(int)
+    result['rank_change'] = result['base_rank'] - result['weighted_rank']
+    return result.sort_values(['weighted_rank', 'employee_id']).reset_index(drop=True)
+
+
+def load_weight_profiles(path=Config.WEIGHT_PROFILES_PATH):
+    """Muat profil bobot tersimpan per peran"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Error loading weight profiles: {str(e)}")
+        return {}
+
+
+def save_weight_profile(role_name, tgv_weights, cap=None, inverse_policy=DEFAULT_POLICY, path=Config.WEIGHT_PROFILES_PATH):
+    """Simpan profil bobot untuk satu peran (menimpa profil lama dengan nama sama)"""
+    profiles = load_weight_profiles(path)
+    profiles[role_name] = {
+        'weights': {name: float(weight) for name, weight in tgv_weights.items()},
+        'cap': cap,
+        'inverse_policy': inverse_policy,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp_path, path)
+    logging.info(f"Saved weight profile for role {role_name}")
+    return profiles
@@ -0,0 +1,67 @@
+"""
+sample_data.py - Data sumber contoh (CSV) bersama untuk pengujian
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+EMPLOYEE_IDS = [f"EMP{100000 + i}" for i in range(12)]
+BENCHMARK_IDS = EMPLOYEE_IDS[:3]
+
+
+def write_fixture(directory):
+    """Tabel sumber minimal (<tabel>.csv) yang cukup untuk pencocokan"""
+    rng = np.random.default_rng(7)
+    n = len(EMPLOYEE_IDS)
+    themes = ['Achiever', 'Analytical', 'Focus', 'Learner', 'Relator', 'Strategic', 'Woo']
+    tables = {
+        "employees": pd.DataFrame({
+            'employee_id': EMPLOYEE_IDS,
+            'fullname': [f"Name {i}" for i in range(n)],
+            'nip': EMPLOYEE_IDS,
+            'company_id': 1,
+            'position_id': [1 + i % 2 for i in range(n)],
+            'division_id': 1,
+            'directorate_id': [1 + i % 2 for i in range(n - 1)] + [None],
+            'grade_id': [1 + i % 3 for i in range(n)],
+            'education_id': [1 + i % 2 for i in range(n)],
+            'department_id': 1,
+            'major_id': [1 + i % 2 for i in range(n)],
+            'years_of_service_months': [12 * (i + 1) for i in range(n)],
+        }),
+        "dim_directorates": pd.DataFrame({'directorate_id': [1, 2], 'name': ['Commercial', 'Technology']}),
+        "dim_positions": pd.DataFrame({'position_id': [1, 2], 'name': ['Data Analyst', 'HRBP']}),
+        "dim_grades": pd.DataFrame({'grade_id': [1, 2, 3], 'name': ['III', 'IV', 'V']}),
+        "dim_divisions": pd.DataFrame({'division_id': [1], 'name': ['Operations']}),
+        "profiles_psych": pd.DataFrame({
+            'employee_id': EMPLOYEE_IDS,
+            'pauli': rng.integers(30, 70, n),
+            'iq': rng.integers(90, 130, n),
+        }),
+        "papi_scores": pd.DataFrame([
+            {'employee_id': employee_id, 'scale_code': scale, 'score': int(rng.integers(1, 10))}
+            for employee_id in EMPLOYEE_IDS for scale in ['Papi_A', 'Papi_N']
+        ]),
+        "competencies_yearly": pd.DataFrame([
+            {'employee_id': employee_id, 'pillar_code': pillar, 'year': year, 'score': int(rng.integers(1, 6))}
+            for employee_id in EMPLOYEE_IDS for pillar in ['GDR', 'CEX'] for year in [2024, 2025]
+        ]),
+        "performance_yearly": pd.DataFrame({'employee_id': EMPLOYEE_IDS, 'year': 2025, 'rating': rng.integers(1, 6, n)}),
+        "dim_talent_mapping": pd.DataFrame({
+            'Sub-test': ['iq', 'pauli', 'Papi_A', 'Papi_N', 'GDR', 'CEX'],
+            'Talent Group Variable (TGV)': ['Cognitive', 'Cognitive', 'Drive', 'Drive', 'Leadership', 'Leadership'],
+            'Meaning': 'm',
+            'Behavior Example': 'b',
+            'Note': ['', '', '', 'Inverse Scale', '', ''],
+        }),
+        "dim_education": pd.DataFrame({'education_id': [1, 2], 'name': ['S1', 'S2']}),
+        "dim_departments": pd.DataFrame({'department_id': [1], 'name': ['Analytics']}),
+        "dim_majors": pd.DataFrame({'major_id': [1, 2], 'name': ['Statistics', 'Psychology']}),
+        "strengths": pd.DataFrame([
+            {'employee_id': employee_id, 'rank': rank, 'theme': themes[(i + rank) % len(themes)]}
+            for i, employee_id in enumerate(EMPLOYEE_IDS) for rank in range(1, 7)
+        ]),
+    }
+    for table_name, df in tables.items():
+        df.to_csv(os.path.join(directory, f"{table_name}.csv"), index=False)
@@ -0,0 +1,47 @@
+"""
+test_chunked.py - Pencocokan bertahap per partisi harus sama dengan pencocokan penuh
+"""
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from sample_data import BENCHMARK_IDS, EMPLOYEE_IDS, write_fixture
+from src import chunked, database
+
+
+class ChunkedMatchingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.TemporaryDirectory()
+        write_fixture(cls.data_dir.name)
+        # Partisi terakhir (chunk_size=4) tidak punya baris PAPI sama sekali
+        path = os.path.join(cls.data_dir.name, "papi_scores.csv")
+        df_papi = pd.read_csv(path)
+        df_papi[~df_papi['employee_id'].isin(EMPLOYEE_IDS[8:])].to_csv(path, index=False)
+        cls.loader = database.CsvTableLoader(cls.data_dir.name)
+        cls.full = database.run_matching_query(BENCHMARK_IDS, loader=cls.loader)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.data_dir.cleanup()
+
+    def test_ranking_equals_full_matching(self):
+        summary, _ = chunked.run_matching_chunked(BENCHMARK_IDS, loader=self.loader, chunk_size=4, top_k=5)
+        expected = self.full.drop_duplicates('employee_id').set_index('employee_id')['final_match_rate']
+        actual = summary.set_index('employee_id')['final_match_rate']
+        self.assertEqual(set(actual.index), set(EMPLOYEE_IDS))
+        pd.testing.assert_series_equal(actual.sort_index(), expected.sort_index(), check_dtype=False,
+                                      check_index_type=False, atol=1e-4)
+
+    def test_top_k_details_equal_full_matching(self):
+        _, top = chunked.run_matching_chunked(BENCHMARK_IDS, loader=self.loader, chunk_size=4, top_k=5)
+        top_ids = self.full.drop_duplicates('employee_id').head(5)['employee_id']
+        expected = self.full[self.full['employee_id'].isin(top_ids)]
+        pd.testing.assert_frame_equal(top.reset_index(drop=True), expected.reset_index(drop=True),
+                                      check_dtype=False, atol=1e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
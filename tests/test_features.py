@@ -0,0 +1,85 @@
+"""
+test_features.py - Matriks fitur ber-cache per blok dan penyegaran snapshot tabel yang inkremental
+"""
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from sample_data import EMPLOYEE_IDS, write_fixture
+from src import database, features
+
+
+class RecordingLoader(database.CsvTableLoader):
+    """Loader CSV yang mencatat tabel yang benar-benar dimuat"""
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.loaded = []
+
+    def __call__(self, table_name, **kwargs):
+        self.loaded.append(table_name)
+        return super().__call__(table_name, **kwargs)
+
+
+class FeatureStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        write_fixture(self.data_dir.name)
+        self.loader = RecordingLoader(self.data_dir.name)
+        self.store = features.FeatureStore(self.loader, cache_dir=self.cache_dir.name)
+
+    def tearDown(self):
+        self.data_dir.cleanup()
+        self.cache_dir.cleanup()
+
+    def test_feature_matrix_columns(self):
+        matrix = self.store.feature_matrix()
+        self.assertEqual(list(matrix.index), EMPLOYEE_IDS)
+        self.assertEqual(
+            list(matrix.columns[:9]),
+            ['fullname', 'grade', 'years_of_service_months', 'education', 'department', 'major',
+             'position', 'directorate', 'rating'],
+        )
+        self.assertIn('strength_Achiever', matrix.columns)
+        self.assertIn('GDR', matrix.columns)
+        self.assertIn('Papi_N', matrix.columns)
+        # Jumlah tema strength per karyawan = 5 peringkat teratas
+        strength_columns = [col for col in matrix.columns if col.startswith('strength_')]
+        self.assertTrue((matrix[strength_columns].sum(axis=1) == 5).all())
+
+    def test_cached_blocks_are_reused(self):
+        matrix = self.store.feature_matrix()
+        other = features.FeatureStore(self.loader, cache_dir=self.cache_dir.name)
+        pd.testing.assert_frame_equal(other.feature_matrix(), matrix)
+
+    def test_refresh_reloads_only_changed_tables(self):
+        self.store.load_tables(database.SOURCE_TABLES, refresh=True)
+        self.loader.loaded.clear()
+        self.store.load_tables(database.SOURCE_TABLES, refresh=True)
+        self.assertEqual(self.loader.loaded, [])
+
+        path = os.path.join(self.data_dir.name, "dim_grades.csv")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("4,VI\n")
+        self.store.load_tables(database.SOURCE_TABLES, refresh=True)
+        self.assertEqual(self.loader.loaded, ["dim_grades"])
+
+    def test_model_keeps_unrated_employees(self):
+        path = os.path.join(self.data_dir.name, "performance_yearly.csv")
+        df_perf = pd.read_csv(path)
+        df_perf.loc[df_perf['employee_id'] == EMPLOYEE_IDS[0], 'rating'] = None
+        df_perf.to_csv(path, index=False)
+
+        X, y = features.model_inputs(self.store.feature_matrix())
+        self.assertEqual(len(X), len(EMPLOYEE_IDS))
+        self.assertFalse(y[EMPLOYEE_IDS[0]])
+        self.assertFalse({'fullname', 'rating', 'is_top_performer'} & set(X.columns))
+
+        _, importance = features.train_top_performer_model(self.store.feature_matrix(), n_estimators=10, n_jobs=1)
+        self.assertAlmostEqual(importance['importance'].sum(), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+test_ranking_store.py - Hasil ranking tersimpan harus bisa dibaca kembali per kunci dan dibuang saat data berubah
+"""
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from src.ranking_store import RankingStore
+
+
+def _results():
+    return pd.DataFrame({
+        'employee_id': ['E2', 'E2', 'E1'],
+        'tgv_name': ['Cognitive', 'Drive', 'Cognitive'],
+        'final_match_rate': [91.5, 91.5, 78.25],
+    })
+
+
+class RankingStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = RankingStore(os.path.join(self.directory.name, "rankings.sqlite"))
+
+    def test_round_trip_keeps_rows_and_order(self):
+        self.store.put("Data Analyst", ['B1', 'B2'], None, "v1", _results())
+        stored = self.store.get("Data Analyst", ['B1', 'B2'], None, "v1")
+        pd.testing.assert_frame_equal(stored, _results())
+
+    def test_key_ignores_benchmark_and_cohort_order(self):
+        cohort = {'directorate': ['Ops', 'Finance']}
+        self.store.put("Data Analyst", ['B1', 'B2'], 2024, "v1", _results(), cohort=cohort)
+        stored = self.store.get("Data Analyst", ['B2', 'B1'], 2024, "v1", cohort={'directorate': ['Finance', 'Ops']})
+        self.assertEqual(len(stored), 3)
+        self.assertTrue(self.store.get("Data Analyst", ['B1', 'B2'], 2024, "v1").empty)
+        self.assertTrue(self.store.get("Data Analyst", ['B1', 'B2'], 2023, "v1", cohort=cohort).empty)
+
+    def test_results_older_than_max_age_are_ignored(self):
+        self.store.put("Data Analyst", ['B1'], None, "v1", _results())
+        time.sleep(0.05)
+        self.assertTrue(self.store.get("Data Analyst", ['B1'], None, "v1", max_age=0.01).empty)
+        self.assertFalse(self.store.get("Data Analyst", ['B1'], None, "v1", max_age=60).empty)
+
+    def test_new_data_version_drops_old_runs(self):
+        self.store.put("Data Analyst", ['B1'], None, "v1", _results())
+        self.store.put("Data Scientist", ['B3'], None, "v1", _results())
+        self.store.put("Data Analyst", ['B1'], None, "v2", _results().head(1))
+
+        self.assertTrue(self.store.get("Data Analyst", ['B1'], None, "v1").empty)
+        self.assertTrue(self.store.get("Data Scientist", ['B3'], None, "v1").empty)
+        self.assertEqual(len(self.store.get("Data Analyst", ['B1'], None, "v2")), 1)
+
+    def test_list_runs(self):
+        self.store.put("Data Analyst", ['B2', 'B1'], None, "v1", _results())
+        self.store.put("Data Scientist", ['B3'], 2024, "v1", _results())
+
+        runs = self.store.list_runs()
+        self.assertEqual(list(runs['role_name']), ["Data Scientist", "Data Analyst"])
+        analyst = self.store.list_runs("Data Analyst").iloc[0]
+        self.assertEqual(analyst['benchmark_ids'], ['B1', 'B2'])
+        self.assertEqual(analyst['n_employees'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
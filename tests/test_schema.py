@@ -0,0 +1,50 @@
+"""
+test_schema.py - Tipe kolom dari ERD saat tabel dimuat dan konversi kembali ke tipe biasa
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src import database, schema
+
+
+class ApplySchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.employees = schema.apply_schema("employees", pd.DataFrame({
+            'employee_id': ['EMP1', 'EMP2', 'EMP3'],
+            'grade_id': [1, None, 3],
+            'position_id': [1, 2, 3],
+            'years_of_service_months': [12, 400, None],
+        }))
+        self.performance = schema.apply_schema("performance_yearly", pd.DataFrame({
+            'employee_id': ['EMP1', 'EMP2', 'EMP3'],
+            'year': [2025, 2025, 2025],
+            'rating': [5, None, 3],
+        }))
+
+    def test_integer_columns_are_downcast(self):
+        dtypes = self.employees.dtypes
+        self.assertEqual(dtypes['position_id'], np.int8)
+        self.assertEqual(dtypes['grade_id'], pd.Int8Dtype())
+        self.assertEqual(dtypes['years_of_service_months'], pd.Int16Dtype())
+        self.assertIsInstance(dtypes['employee_id'], pd.CategoricalDtype)
+
+    def test_nullable_ids_keep_integer_values(self):
+        self.assertEqual(self.employees['grade_id'].dropna().tolist(), [1, 3])
+        filtered = database.apply_filters(self.employees, {'grade_id': [3]})
+        self.assertEqual(filtered['employee_id'].tolist(), ['EMP3'])
+
+    def test_plain_dtypes_turn_nullable_integers_into_float(self):
+        plain = database.to_plain_dtypes(self.performance)
+        self.assertEqual(plain['rating'].dtype, np.float64)
+        self.assertEqual(plain['employee_id'].dtype, object)
+        self.assertEqual((plain['rating'] == 5).tolist(), [True, False, False])
+
+    def test_unknown_table_is_unchanged(self):
+        df = pd.DataFrame({'Sub-test': ['iq'], 'Note': [None]})
+        self.assertIs(schema.apply_schema("dim_talent_mapping", df), df)
+
+
+if __name__ == '__main__':
+    unittest.main()
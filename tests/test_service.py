@@ -0,0 +1,84 @@
+"""
+test_service.py - Uji ujung-ke-ujung layanan HTTP pencocokan dengan sumber data CSV lokal
+"""
+import json
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from sample_data import BENCHMARK_IDS, EMPLOYEE_IDS, write_fixture
+from src import database, service
+
+
+class MatchingServiceHttpTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.TemporaryDirectory()
+        write_fixture(cls.data_dir.name)
+        matching_service = service.MatchingService(loader=database.CsvTableLoader(cls.data_dir.name))
+        matching_service.warm_up()
+        cls.server = service.create_server(matching_service, host='127.0.0.1', port=0, workers=2)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.data_dir.cleanup()
+
+    def request(self, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_match_ranks_all_employees(self):
+        status, payload = self.request('/match', {'benchmark_ids': BENCHMARK_IDS, 'page_size': 5})
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['total'], len(EMPLOYEE_IDS))
+        self.assertEqual([row['rank'] for row in payload['results']], [1, 2, 3, 4, 5])
+        scores = [row['final_match_rate'] for row in payload['results']]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_match_rejects_non_list_benchmarks(self):
+        status, payload = self.request('/match', {'benchmark_ids': BENCHMARK_IDS[0]})
+        self.assertEqual(status, 400)
+        self.assertIn('error', payload)
+
+    def test_match_with_cohort(self):
+        cohort = {'directorate': ['Technology'], 'tenure_months': [24, None]}
+        status, payload = self.request('/match', {'benchmark_ids': BENCHMARK_IDS, 'page_size': 50, 'cohort': cohort})
+        self.assertEqual(status, 200)
+        returned = {row['employee_id'] for row in payload['results']}
+        # karyawan terakhir tanpa directorate_id tidak termasuk kohort
+        expected = set(EMPLOYEE_IDS[1:-1:2])
+        self.assertEqual(returned, expected | set(BENCHMARK_IDS))
+
+    def test_match_rejects_malformed_cohort(self):
+        for cohort in [{'directorate': 'Technology'}, {'tenure_months': 5}, {'grade': [3]},
+                       {'tenure_months': ['a', None]}, {'unknown': ['x']}]:
+            status, _ = self.request('/match', {'benchmark_ids': BENCHMARK_IDS, 'cohort': cohort})
+            self.assertEqual(status, 400, cohort)
+
+    def test_breakdown(self):
+        employee_id = EMPLOYEE_IDS[5]
+        status, payload = self.request(f"/employee/{employee_id}/breakdown?benchmark_ids={','.join(BENCHMARK_IDS)}")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['employee_id'], employee_id)
+        self.assertEqual({row['tgv_name'] for row in payload['tgv']}, {'Cognitive', 'Drive', 'Leadership'})
+        self.assertEqual(len(payload['tv']), 6)
+
+    def test_breakdown_unknown_employee(self):
+        status, _ = self.request(f"/employee/EMP999999/breakdown?benchmark_ids={','.join(BENCHMARK_IDS)}")
+        self.assertEqual(status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+test_weighting.py - Skor ulang what-if dari matriks skor harus konsisten dengan hasil pencocokan
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from sample_data import BENCHMARK_IDS, write_fixture
+from src import database, weighting
+
+
+class WeightingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_fixture(data_dir)
+            cls.results = database.run_matching_query(BENCHMARK_IDS, loader=database.CsvTableLoader(data_dir))
+        cls.matrices = weighting.build_score_matrices(cls.results)
+
+    def test_equal_weights_reproduce_final_match_rate(self):
+        rescored = weighting.rescore(self.matrices)
+        np.testing.assert_allclose(rescored['weighted_match_rate'], rescored['final_match_rate'], atol=1e-3)
+        self.assertTrue((rescored['rank_change'] == 0).all())
+
+    def test_tgv_weights_average_tgv_match_rates(self):
+        weights = {'Cognitive': 3.0, 'Drive': 1.0, 'Leadership': 0.0}
+        rescored = weighting.rescore(self.matrices, weights).set_index('employee_id')['weighted_match_rate']
+        tgv = self.results.drop_duplicates(['employee_id', 'tgv_name']).pivot(
+            index='employee_id', columns='tgv_name', values='tgv_match_rate'
+        )
+        expected = (3.0 * tgv['Cognitive'] + tgv['Drive']) / 4.0
+        np.testing.assert_allclose(rescored.loc[expected.index], expected, atol=1e-3)
+
+    def test_weight_profile_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "weight_profiles.json")
+            weighting.save_weight_profile("Data Analyst", {'Cognitive': 2}, cap=120, path=path)
+            profile = weighting.load_weight_profiles(path)["Data Analyst"]
+        self.assertEqual(profile, {'weights': {'Cognitive': 2.0}, 'cap': 120, 'inverse_policy': weighting.DEFAULT_POLICY})
+
+
+if __name__ == '__main__':
+    unittest.main()